@@ -7,7 +7,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = "django-insecure-2)^@zz%wjg$x8px+w!oreybpeso(vaqvtwux@zqlfhg+e#-tpx"
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.environ.get('BOOKHUB_DEBUG', '1') == '1'
 
 ALLOWED_HOSTS = []
 
@@ -22,7 +22,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.middleware.RequestProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "django.middleware.gzip.GZipMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -44,18 +46,59 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'core.context_processors.cart_summary',
             ],
         },
     },
 ]
 
+# Outside development, compiled templates are kept in memory for the life of the process
+if not DEBUG:
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
 WSGI_APPLICATION = "BookHub.wsgi.application"
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+# Database profile, chosen with BOOKHUB_DB=sqlite (default) or BOOKHUB_DB=postgres.
+# The Postgres profile needs psycopg (pip install "psycopg[binary]").
+if os.environ.get('BOOKHUB_DB', 'sqlite') == 'postgres':
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.environ.get('POSTGRES_DB', 'bookhub'),
+            "USER": os.environ.get('POSTGRES_USER', 'bookhub'),
+            "PASSWORD": os.environ.get('POSTGRES_PASSWORD', ''),
+            "HOST": os.environ.get('POSTGRES_HOST', 'localhost'),
+            "PORT": os.environ.get('POSTGRES_PORT', '5432'),
+        }
+    }
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.environ.get('BOOKHUB_SQLITE_PATH', BASE_DIR / "db.sqlite3"),
+        }
     }
+
+# Persistent connections, checked before reuse
+DATABASES["default"]["CONN_MAX_AGE"] = int(os.environ.get('BOOKHUB_CONN_MAX_AGE', 60))
+DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+
+# Applied to each new SQLite connection by core.db.configure_sqlite: WAL lets
+# readers run while a checkout writes, NORMAL sync is safe in WAL mode, writers
+# wait up to busy_timeout ms for the lock, plus 256MB mmap and a 64MB page cache.
+SQLITE_PRAGMAS = {
+    'busy_timeout': 5000,
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64000,
+    'temp_store': 'memory',
 }
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -88,6 +131,59 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Catalog reads and cart summaries are cached. Local memory is per process:
+# with several worker processes set BOOKHUB_CACHE=file so invalidations
+# reach all of them.
+if os.environ.get('BOOKHUB_CACHE') == 'file':
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": BASE_DIR / "cache",
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "bookhub",
+            "OPTIONS": {"MAX_ENTRIES": 10000},
+        }
+    }
+
+# Cover rendering runs in a local process pool after the book is committed
+COVER_RENDER_ASYNC = True
+COVER_RENDER_WORKERS = 2
+
+# Payments are authorized on a background event loop; orders stay pending until then
+PAYMENT_GATEWAY = 'core.payments.SimulatedGateway'
+PAYMENT_SIMULATOR_LATENCY = 1.0
+PAYMENT_SIMULATOR_APPROVAL_RATE = 0.95
+# Orders still pending after this many seconds lost their payment job (process restart);
+# settle_pending_payments, run from cron, processes them again
+PAYMENT_PENDING_TIMEOUT = 15 * 60
+
+# Per-request timings (Server-Timing header + JSON log line on core.performance).
+# PROFILING_SAMPLE_RATE = N dumps a cProfile of one request in N to PROFILING_DIR.
+# On by default only with DEBUG, since Server-Timing shows every client where the time goes.
+PROFILING_ENABLED = os.environ.get('BOOKHUB_PROFILING', '1' if DEBUG else '0') == '1'
+PROFILING_SAMPLE_RATE = int(os.environ.get('BOOKHUB_PROFILE_EVERY', 0))
+PROFILING_DIR = BASE_DIR / 'profiles'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core': {
+            'handlers': ['console'],
+            'level': os.environ.get('BOOKHUB_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
 # Authentication
 LOGIN_REDIRECT_URL = 'home'
 LOGOUT_REDIRECT_URL = 'home'
@@ -0,0 +1,32 @@
+"""Django bootstrap shared by the benchmark scripts.
+
+Benchmarks never touch db.sqlite3: they migrate a throwaway SQLite file (or
+the database given in BENCH_DB) so large synthetic catalogs can be loaded
+freely. With BOOKHUB_DB=postgres they use the configured Postgres database,
+which should then be a scratch one.
+"""
+import os
+import sys
+import tempfile
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+def setup(db_path=None):
+    import django
+    from django.conf import settings
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'BookHub.settings')
+    if settings.DATABASES['default']['ENGINE'].endswith('sqlite3'):
+        db_path = db_path or os.environ.get('BENCH_DB') or os.path.join(tempfile.mkdtemp(), 'bench.sqlite3')
+        settings.DATABASES['default']['NAME'] = db_path
+    else:
+        db_path = settings.DATABASES['default']['NAME']
+    settings.COVER_RENDER_ASYNC = False
+    settings.DEBUG = False
+    settings.ALLOWED_HOSTS = ['testserver', 'localhost']
+    django.setup()
+
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+    return db_path
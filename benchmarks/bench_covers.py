@@ -0,0 +1,46 @@
+"""Per-cover render time: legacy putpixel loop vs the bulk noise background.
+
+Usage: python benchmarks/bench_covers.py [iterations]
+"""
+import os
+import sys
+import random
+import time
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from PIL import Image
+from core.utils import COVER_SIZE, DEFAULT_COLOR, noise_background, render_book_cover
+
+def legacy_noise_background(base_color, size=COVER_SIZE):
+    width, height = size
+    img = Image.new('RGB', size, base_color)
+    for y in range(height):
+        for x in range(width):
+            noise = random.randint(-15, 15)
+            r = max(0, min(255, base_color[0] + noise))
+            g = max(0, min(255, base_color[1] + noise))
+            b = max(0, min(255, base_color[2] + noise))
+            img.putpixel((x, y), (r, g, b))
+    return img
+
+def timeit(func, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1000
+
+def main(iterations=5):
+    legacy = timeit(lambda: legacy_noise_background(DEFAULT_COLOR), iterations)
+    bulk = timeit(lambda: noise_background(DEFAULT_COLOR), iterations * 20)
+    full = timeit(lambda: render_book_cover('A Brief History of Time', 'Stephen Hawking',
+                                            'Science and Technology', '9780553380163'), iterations * 20)
+
+    print(f"Noise background (putpixel loop): {legacy:8.2f} ms/cover")
+    print(f"Noise background (bulk buffer):   {bulk:8.2f} ms/cover")
+    print(f"Speedup:                          {legacy / bulk:8.1f}x")
+    print(f"Full cover render (new engine):   {full:8.2f} ms/cover")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
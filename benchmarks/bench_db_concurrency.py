@@ -0,0 +1,127 @@
+"""Read/write throughput of the database profiles under concurrent load.
+
+READERS threads browse the catalog (a category page and a book detail) while
+WRITERS threads run checkout-like transactions decrementing the stock of two
+books. Every operation is followed by ``close_old_connections()``, as at the
+end of a request, so CONN_MAX_AGE behaves as it would under runserver/gunicorn.
+
+Profiles, each run in its own process:
+
+* sqlite-default:  rollback journal, no pragmas, a new connection per request
+                   (the settings before the database profile was added);
+* sqlite-wal:      the SQLITE_PRAGMAS profile with persistent connections;
+* postgres:        only with BENCH_POSTGRES=1, using the POSTGRES_* settings
+                   (point POSTGRES_DB at a scratch database).
+
+Usage: python benchmarks/bench_db_concurrency.py [readers] [writers] [seconds]
+"""
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+
+import _django
+
+BOOKS = 2000
+CATEGORIES = 10
+
+def configure(profile):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'BookHub.settings')
+    from django.conf import settings
+    if profile == 'sqlite-default':
+        settings.SQLITE_PRAGMAS = {}
+        settings.DATABASES['default']['CONN_MAX_AGE'] = 0
+
+def seed():
+    from core.models import Author, Book, Category
+
+    Book.objects.all().delete()
+    categories = [Category.objects.get_or_create(name=f'Bench {i}')[0] for i in range(CATEGORIES)]
+    author, _ = Author.objects.get_or_create(name='Bench Author')
+    Book.objects.bulk_create(
+        Book(title=f'Bench Book {i}', author=author, category=categories[i % CATEGORIES],
+             isbn=f'97{i:011d}', description='', price=10, stock_quantity=1_000_000)
+        for i in range(BOOKS)
+    )
+    return [c.pk for c in categories], list(Book.objects.values_list('pk', flat=True))
+
+def read(category_ids, book_ids):
+    from core.models import Book
+    list(Book.objects.filter(stock_quantity__gt=0, category_id=random.choice(category_ids))
+         .select_related('author').order_by('-created_at')[:24])
+    Book.objects.select_related('author', 'category').get(pk=random.choice(book_ids))
+
+def write(category_ids, book_ids):
+    from django.db import transaction
+    from django.db.models import F
+    from django.utils import timezone
+    from core.models import Book
+    with transaction.atomic():
+        for book_id in random.sample(book_ids, 2):
+            Book.objects.filter(pk=book_id).update(
+                stock_quantity=F('stock_quantity') - 1, updated_at=timezone.now()
+            )
+
+def worker(operation, deadline, stats, args):
+    from django.db import close_old_connections, connection
+    latencies, errors = [], 0
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            operation(*args)
+            latencies.append(time.perf_counter() - start)
+        except Exception:
+            errors += 1
+        close_old_connections()
+    connection.close()
+    stats.append((latencies, errors))
+
+def summarize(stats, seconds):
+    latencies = sorted(l for run, errors in stats for l in run)
+    errors = sum(errors for run, errors in stats)
+    p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else 0
+    return len(latencies) / seconds, p95, errors
+
+def run_profile(profile, readers, writers, seconds):
+    configure(profile)
+    _django.setup()
+    from django.db import connection
+    category_ids, book_ids = seed()
+    connection.close()
+
+    read_stats, write_stats = [], []
+    deadline = time.perf_counter() + seconds
+    threads = [threading.Thread(target=worker, args=(read, deadline, read_stats, (category_ids, book_ids)))
+               for _ in range(readers)]
+    threads += [threading.Thread(target=worker, args=(write, deadline, write_stats, (category_ids, book_ids)))
+                for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    reads, read_p95, read_errors = summarize(read_stats, seconds)
+    writes, write_p95, write_errors = summarize(write_stats, seconds)
+    print(f"{profile:<16}{reads:>10.0f}{read_p95:>10.1f}{writes:>10.0f}{write_p95:>10.1f}"
+          f"{read_errors + write_errors:>8}")
+
+def main(readers, writers, seconds):
+    profiles = ['sqlite-default', 'sqlite-wal']
+    if os.environ.get('BENCH_POSTGRES'):
+        profiles.append('postgres')
+    print(f"{readers} readers, {writers} writers, {seconds}s per profile\n")
+    print(f"{'profile':<16}{'reads/s':>10}{'p95 ms':>10}{'writes/s':>10}{'p95 ms':>10}{'errors':>8}")
+    for profile in profiles:
+        env = dict(os.environ, BOOKHUB_DB='postgres' if profile == 'postgres' else 'sqlite')
+        env.pop('BENCH_DB', None)
+        subprocess.run([sys.executable, __file__, '--profile', profile, str(readers), str(writers), str(seconds)],
+                       env=env, check=True)
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ['--profile']:
+        run_profile(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]), float(sys.argv[5]))
+    else:
+        args = [int(arg) for arg in sys.argv[1:3]] + [float(arg) for arg in sys.argv[3:4]]
+        main(*(args + [8, 4, 5.0][len(args):]))
@@ -0,0 +1,99 @@
+"""Render time of a 1,000-book catalog page, with and without cached cards.
+
+* uncached:   every card rendered inline, as book_list.html did before
+              cards became cached fragments;
+* cold:       empty cache, every card rendered and stored;
+* warm cards: the page changed (one book was edited) so the grid is
+              re-assembled, all other cards come from the cache;
+* warm grid:  nothing changed, the whole grid is one cache hit.
+
+Templates are compiled once before timing, as with the cached loader.
+
+Usage: python benchmarks/bench_render.py [books] [repeats]
+"""
+import sys
+import time
+
+import _django
+
+UNCACHED_PAGE = '''{% for book in books %}
+<div class="book-card">
+    <div class="book-cover">
+        {% if book.cover_image %}
+        <img src="{{ book.cover_image.url }}" alt="{{ book.title }}" loading="lazy">
+        {% else %}
+        <div class="no-cover">📚</div>
+        {% endif %}
+    </div>
+    <div class="book-info">
+        <h3 class="book-title">{{ book.title }}</h3>
+        <p class="book-author">{{ book.author.name }}</p>
+        <p class="book-price">{{ book.price }} KES</p>
+        <div class="book-actions">
+            <a href="{% url 'book_detail' book.id %}" class="btn btn-outline">Détails</a>
+            {% if user.is_authenticated %}
+            <button onclick="addToCart({{ book.id }}, this)" class="btn btn-primary">Ajouter</button>
+            {% endif %}
+        </div>
+    </div>
+</div>
+{% endfor %}'''
+
+CACHED_PAGE = '''{% load cache book_extras %}
+{% cache 86400 catalog_grid books|book_versions user.is_authenticated %}
+{% for book in books %}{% include 'core/includes/book_card.html' %}{% endfor %}
+{% endcache %}'''
+
+def make_books(count):
+    from core.models import Author, Book, Category
+    from core.views import BOOK_CARD_FIELDS
+
+    category, _ = Category.objects.get_or_create(name='Render')
+    authors = Author.objects.bulk_create(Author(name=f'Author {i}') for i in range(50))
+    Book.objects.bulk_create(
+        Book(title=f'Render Book {i}', author=authors[i % 50], category=category, isbn=f'96{i:011d}',
+             description='', price=12.5, stock_quantity=3, cover_image=f'book_covers/{i}.jpg' if i % 2 else '')
+        for i in range(count)
+    )
+    return list(Book.objects.select_related('author').only(*BOOK_CARD_FIELDS))
+
+def best_of(render, repeats, before=None):
+    timings = []
+    for _ in range(repeats):
+        if before:
+            before()
+        start = time.perf_counter()
+        render()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main(count, repeats):
+    _django.setup()
+    from django.contrib.auth.models import AnonymousUser
+    from django.core.cache import cache
+    from django.template import engines
+    from django.utils import timezone
+
+    engine = engines['django']
+    context = {'books': make_books(count), 'user': AnonymousUser()}
+    uncached = engine.from_string(UNCACHED_PAGE)
+    cached = engine.from_string(CACHED_PAGE)
+    cached.render(context)
+
+    def edit_one_book():
+        context['books'][0].updated_at = timezone.now()
+
+    results = [
+        ('uncached', best_of(lambda: uncached.render(context), repeats)),
+        ('cold', best_of(lambda: cached.render(context), repeats, before=cache.clear)),
+        ('warm cards', best_of(lambda: cached.render(context), repeats, before=edit_one_book)),
+        ('warm grid', best_of(lambda: cached.render(context), repeats)),
+    ]
+    print(f"{count} book cards, best of {repeats}\n")
+    print(f"{'mode':<12}{'ms':>10}{'speedup':>10}")
+    for mode, seconds in results:
+        print(f"{mode:<12}{seconds * 1000:>10.1f}{results[0][1] / seconds:>9.1f}x")
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:3]]
+    main(*(args + [1000, 5][len(args):]))
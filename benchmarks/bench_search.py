@@ -0,0 +1,83 @@
+"""Catalog search: FTS5 index vs the old icontains filter.
+
+Usage: python benchmarks/bench_search.py [number_of_books]
+"""
+import itertools
+import random
+import sys
+import time
+
+import _django
+
+WORDS = [
+    'history', 'time', 'garden', 'python', 'economics', 'river', 'night', 'silent', 'empire',
+    'kitchen', 'quantum', 'law', 'spirit', 'ocean', 'mountain', 'letters', 'journey', 'light',
+    'shadow', 'market', 'music', 'theory', 'children', 'stone', 'winter', 'faith', 'harvest',
+]
+SYLLABLES = ['ka', 'lo', 'mi', 'ra', 'sen', 'tor', 'vel', 'an', 'dru', 'be', 'no', 'zi', 'har', 'qua']
+QUERIES = ['harr', 'history', 'quantum theory', 'smith', '978000001', 'zzzz', 'sil']
+
+def make_vocabulary(rng, size):
+    words = set(WORDS)
+    while len(words) < size:
+        words.add(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words, key=lambda w: (w not in WORDS, w))
+
+def load_catalog(n_books):
+    from core.models import Author, Book, Category
+    from core.search import rebuild_index
+
+    rng = random.Random(42)
+    vocabulary = make_vocabulary(rng, 5000)
+    # Zipf-like word popularity: a few common words, a long tail of rare ones
+    weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+    last_names = ['Smith', 'Diallo', 'Nguyen', 'Harrison', 'Okafor', 'Garcia'] + vocabulary[100:600]
+
+    category = Category.objects.create(name='Benchmark')
+    authors = Author.objects.bulk_create(
+        Author(name=f"{rng.choice(vocabulary[:300]).title()} {rng.choice(last_names).title()}")
+        for _ in range(max(1, n_books // 20))
+    )
+    batch = []
+    for i in range(n_books):
+        title = ' '.join(rng.choices(vocabulary, cum_weights=weights, k=rng.randint(2, 5))).title()
+        batch.append(Book(
+            title=title, author=rng.choice(authors), category=category,
+            isbn=f"978{i:010d}", description='', price=10, stock_quantity=rng.randint(0, 20),
+        ))
+        if len(batch) == 5000:
+            Book.objects.bulk_create(batch)
+            batch = []
+    Book.objects.bulk_create(batch)
+    return rebuild_index()
+
+def bench(func, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+def main(n_books):
+    _django.setup()
+    from core.models import Book
+    from core.search import legacy_filter, search_books
+
+    start = time.perf_counter()
+    indexed = load_catalog(n_books)
+    print(f"Loaded and indexed {indexed} books in {time.perf_counter() - start:.1f}s\n")
+
+    base = Book.objects.filter(stock_quantity__gt=0)
+    # "top 10" is the live search dropdown, "all" is a book_list results page
+    print(f"{'query':<16}{'matches':>9}{'top 10: icontains':>19}{'fts5':>8}{'all: icontains':>16}{'fts5':>8}  (ms)")
+    for query in QUERIES:
+        matches = search_books(base, query).count()
+        old_top = bench(lambda: list(legacy_filter(base, query)[:10].values_list('id', flat=True)))
+        new_top = bench(lambda: list(search_books(base, query)[:10].values_list('id', flat=True)))
+        old_all = bench(lambda: list(legacy_filter(base, query).values_list('id', flat=True)))
+        new_all = bench(lambda: list(search_books(base, query).values_list('id', flat=True)))
+        print(f"{query:<16}{matches:>9}{old_top:>19.2f}{new_top:>8.2f}{old_all:>16.2f}{new_all:>8.2f}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
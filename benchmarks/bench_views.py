@@ -0,0 +1,210 @@
+"""Latency and query count of the main views over a synthetic dataset.
+
+Every view is requested through the test client: once with an empty cache
+(cold), then ``--repeat`` times with the cache warm. The report gives the
+cold time, the warm p50/p95 and the largest number of queries seen.
+
+Results are compared with benchmarks/baselines/views.json. The run fails
+(exit status 1) when a view makes more queries than its ``query_budget``,
+or when its warm p95 is more than ``--threshold`` slower than the baseline
+(and at least ``--min-delta`` ms slower, so sub-millisecond views do not
+fail on noise). Latencies depend on the machine: refresh them with
+``--update`` after a deliberate change or on new hardware. ``--update``
+keeps the query budgets, which are edited by hand.
+
+The dataset comes from generate_dataset (core/dataset.py). With BENCH_DB
+pointing to a database that already holds it, generation is skipped.
+
+Usage: python benchmarks/bench_views.py [--update] [--repeat N] [--order-items N] [--only view,...]
+"""
+import argparse
+import json
+import math
+import os
+import statistics
+import sys
+import time
+
+import _django
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines', 'views.json')
+DATASET = {'seed': 0, 'categories': 12, 'authors': 300, 'books': 5000, 'users': 1000, 'order_items': 20000}
+
+def percentile(timings, p):
+    # Nearest rank
+    ordered = sorted(timings)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+def load_dataset(options):
+    from core.dataset import generate_dataset
+    from core.models import User
+
+    if User.objects.filter(username__startswith='load').exists():
+        print("Reusing the dataset already in the database")
+        return
+    start = time.perf_counter()
+    stats = generate_dataset(**options)
+    print(f"Generated {stats.books} books, {stats.users} users and {stats.order_items} order items "
+          f"in {time.perf_counter() - start:.1f}s")
+
+def make_scenarios():
+    """(name, user, method, path or callable returning it, body) for every view."""
+    from django.db.models import Count
+    from django.urls import reverse
+    from core.models import Book, CartItem, Cart, OrderItem, User
+
+    # The heaviest buyer and the bestseller, so the numbers are the worst case
+    customer = User.objects.annotate(orders=Count('order')).order_by('-orders').first()
+    bestseller = OrderItem.objects.values('book').annotate(n=Count('id')).order_by('-n')[0]['book']
+    cart, _ = Cart.objects.get_or_create(user=customer)
+    for book in Book.objects.filter(stock_quantity__gt=0).order_by('id')[:5]:
+        CartItem.objects.get_or_create(cart=cart, book=book, defaults={'quantity': 1})
+    admin, created = User.objects.get_or_create(username='bench-admin', defaults={'role': 'admin'})
+    category = Book.objects.get(pk=bestseller).category_id
+
+    def new_user():
+        user = User.objects.create(username=f'bench-victim-{time.perf_counter_ns()}')
+        return reverse('admin_delete_user', args=[user.pk])
+
+    return [
+        ('home', None, 'get', reverse('home'), None),
+        ('book_list', None, 'get', reverse('book_list'), None),
+        ('book_list_category', None, 'get', f"{reverse('book_list')}?category={category}", None),
+        ('book_list_search', None, 'get', f"{reverse('book_list')}?search=silent", None),
+        ('book_detail', None, 'get', reverse('book_detail', args=[bestseller]), None),
+        ('live_search', None, 'get', f"{reverse('live_search')}?q=gold", None),
+        ('cart_detail', customer, 'get', reverse('cart_detail'), None),
+        ('checkout', customer, 'get', reverse('checkout'), None),
+        ('my_orders', customer, 'get', reverse('my_orders'), None),
+        ('admin_panel', admin, 'get', reverse('admin_panel'), None),
+        ('admin_users', admin, 'get', reverse('admin_users'), None),
+        ('admin_add_user', admin, 'get', reverse('admin_add_user'), None),
+        ('admin_books', admin, 'get', reverse('admin_books'), None),
+        ('admin_add_book', admin, 'get', reverse('admin_add_book'), None),
+        ('admin_orders', admin, 'get', reverse('admin_orders'), None),
+        ('admin_search_books', admin, 'get', f"{reverse('admin_search_books')}?q=river", None),
+        ('admin_update_book_price', admin, 'post', reverse('admin_update_book_price', args=[bestseller]),
+         json.dumps({'price': 1200})),
+        ('admin_delete_user', admin, 'post', new_user, ''),
+    ]
+
+def measure(client, method, path, body, repeat, max_seconds):
+    from django.core.cache import cache
+    from django.db import connection
+
+    def request():
+        url = path() if callable(path) else path
+        queries = []
+        # Counted here rather than with CaptureQueriesContext, whose log stops at 9,000 queries
+        def count(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+        with connection.execute_wrapper(count):
+            start = time.perf_counter()
+            if method == 'post':
+                response = client.post(url, body, content_type='application/json')
+            else:
+                response = client.get(url)
+            elapsed = (time.perf_counter() - start) * 1000
+        if response.status_code >= 400:
+            raise RuntimeError(f"{url} answered {response.status_code}")
+        return elapsed, len(queries)
+
+    cache.clear()
+    cold, cold_queries = request()
+    warm = []
+    deadline = time.perf_counter() + max_seconds
+    # Slow views stop early, after at least 5 warm requests
+    while len(warm) < repeat and (len(warm) < 5 or time.perf_counter() < deadline):
+        warm.append(request())
+    timings = [elapsed for elapsed, _ in warm]
+    return {
+        'cold_ms': round(cold, 2),
+        'p50_ms': round(statistics.median(timings), 2),
+        'p95_ms': round(percentile(timings, 95), 2),
+        'queries': max([cold_queries] + [count for _, count in warm]),
+    }
+
+def compare(name, result, baseline, threshold, min_delta):
+    """Failure messages for ``result`` against the baseline entry of the view."""
+    if baseline is None:
+        return []
+    failures = []
+    budget = baseline.get('query_budget')
+    if budget is not None and result['queries'] > budget:
+        failures.append(f"{name}: {result['queries']} queries, budget {budget}")
+    limit = baseline['p95_ms'] * (1 + threshold)
+    if result['p95_ms'] > limit and result['p95_ms'] - baseline['p95_ms'] >= min_delta:
+        failures.append(f"{name}: p95 {result['p95_ms']:.1f}ms, baseline {baseline['p95_ms']:.1f}ms")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--update', action='store_true', help="Write the results as the new baseline")
+    parser.add_argument('--repeat', type=int, default=20, help="Warm requests per view")
+    parser.add_argument('--max-seconds', type=float, default=10.0, help="Time limit for the warm requests of a view")
+    parser.add_argument('--threshold', type=float, default=0.25, help="Allowed p95 slowdown, 0.25 = 25%%")
+    parser.add_argument('--min-delta', type=float, default=5.0, help="Ignore slowdowns smaller than this (ms)")
+    parser.add_argument('--order-items', type=int, default=DATASET['order_items'])
+    parser.add_argument('--only', help="Comma-separated view names")
+    parser.add_argument('--baseline', default=BASELINE)
+    args = parser.parse_args()
+
+    _django.setup()
+    import logging
+    from django.test import Client
+
+    # One log line per request would drown the report
+    logging.getLogger('core.performance').setLevel(logging.WARNING)
+    dataset = dict(DATASET, order_items=args.order_items)
+    load_dataset(dataset)
+
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            saved = json.load(f)
+        if saved.get('dataset') != dataset:
+            print(f"Warning: the baseline was recorded on a different dataset ({saved.get('dataset')})")
+        baselines = saved['views']
+
+    only = set(args.only.split(',')) if args.only else None
+    results, failures = {}, []
+    print(f"\n{'view':<26}{'cold':>9}{'p50':>9}{'p95':>9}{'queries':>9}{'budget':>8}{'base p95':>10}  (ms)")
+    for name, user, method, path, body in make_scenarios():
+        if only and name not in only:
+            continue
+        client = Client()
+        if user:
+            client.force_login(user)
+        result = measure(client, method, path, body, args.repeat, args.max_seconds)
+        baseline = baselines.get(name)
+        results[name] = result
+        failures += compare(name, result, baseline, args.threshold, args.min_delta)
+        budget = baseline.get('query_budget', '-') if baseline else '-'
+        base_p95 = f"{baseline['p95_ms']:.1f}" if baseline else '-'
+        print(f"{name:<26}{result['cold_ms']:>9.1f}{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}"
+              f"{result['queries']:>9}{budget:>8}{base_p95:>10}")
+
+    if args.update:
+        views = dict(baselines)
+        for name, result in results.items():
+            # Budgets are a decision, not a measurement: new views start at what they use today
+            budget = baselines.get(name, {}).get('query_budget', result['queries'])
+            views[name] = dict(result, query_budget=budget)
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump({'dataset': dataset, 'repeat': args.repeat, 'views': views}, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    if failures:
+        print("\nRegressions:")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+    print("\nAll views within their budgets")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
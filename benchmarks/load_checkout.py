@@ -0,0 +1,81 @@
+"""Checkout throughput with 50 concurrent users and a 1s payment gateway.
+
+A pool of WORKERS threads plays the WSGI workers; every user submits one
+checkout request to it. Two modes are compared:
+
+* blocking:  the payment is authorized inside the request, as the old
+             ``time.sleep(1)`` checkout did, so each order holds a worker
+             for the gateway latency;
+* async:     the request only places a pending order and returns; payments
+             are settled on the background event loop.
+
+Usage: python benchmarks/load_checkout.py [users] [workers]
+"""
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import _django
+
+def make_users(prefix, count):
+    from core.models import Author, Book, Cart, CartItem, Category, User
+
+    category, _ = Category.objects.get_or_create(name='Load')
+    author, _ = Author.objects.get_or_create(name='Load Author')
+    books = Book.objects.bulk_create(
+        Book(title=f'Load Book {prefix}{i}', author=author, category=category, isbn=f'9{prefix}{i:010d}',
+             description='', price=10, stock_quantity=10000)
+        for i in range(5)
+    )
+    users = []
+    for i in range(count):
+        user = User.objects.create_user(username=f'{prefix}{i}', password='load-pass')
+        cart = Cart.objects.create(user=user)
+        CartItem.objects.bulk_create(CartItem(cart=cart, book=book, quantity=1) for book in books[:1 + i % 3])
+        users.append(user)
+    return users
+
+def run(mode, users, workers):
+    from django.db import connection
+    from django.test import Client
+    from core.models import Order
+    from core.payments import run_payment
+
+    def request(user):
+        client = Client()
+        client.force_login(user)
+        start = time.perf_counter()
+        response = client.post('/checkout/')
+        if mode == 'blocking':
+            order = Order.objects.filter(user=user).latest('id')
+            run_payment(order.pk)
+        elapsed = time.perf_counter() - start
+        connection.close()
+        return response.status_code, elapsed
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(request, users))
+    served = time.perf_counter() - start
+
+    user_ids = [user.id for user in users]
+    while Order.objects.filter(user_id__in=user_ids, status='pending').exists():
+        time.sleep(0.05)
+    settled = time.perf_counter() - start
+
+    latencies = sorted(elapsed for status, elapsed in results)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    statuses = Order.objects.filter(user_id__in=user_ids).values_list('status', flat=True)
+    print(f"{mode:<10}{len(users) / served:>12.1f}{latencies[len(latencies) // 2] * 1000:>10.0f}"
+          f"{p95 * 1000:>10.0f}{settled:>12.2f}   "
+          f"{sum(s == 'confirmed' for s in statuses)} confirmed, {sum(s == 'cancelled' for s in statuses)} declined")
+
+def main(n_users, workers):
+    _django.setup()
+    print(f"{n_users} concurrent users, {workers} request workers\n")
+    print(f"{'mode':<10}{'checkouts/s':>12}{'p50 ms':>10}{'p95 ms':>10}{'settled s':>12}")
+    run('blocking', make_users('b', n_users), workers)
+    run('async', make_users('a', n_users), workers)
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50, int(sys.argv[2]) if len(sys.argv) > 2 else 4)
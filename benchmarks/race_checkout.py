@@ -0,0 +1,60 @@
+"""Concurrent checkouts racing for the last copy of a book.
+
+Every buyer has the same single-copy book in their cart and checks out at the
+same time from its own thread and database connection. Exactly one order
+must be created and the stock must end at zero, never below.
+
+Usage: python benchmarks/race_checkout.py [buyers]
+"""
+import sys
+import threading
+from collections import Counter
+
+import _django
+
+def main(buyers):
+    _django.setup()
+    from django.db import connection
+    from core.checkout import CheckoutError, place_order
+    from core.models import Author, Book, Cart, CartItem, Category, Order, User
+
+    book = Book.objects.create(
+        title='Last Copy', author=Author.objects.create(name='Race Author'),
+        category=Category.objects.create(name='Race'), isbn='9780000000001',
+        description='', price=10, stock_quantity=1,
+    )
+    users = []
+    for i in range(buyers):
+        user = User.objects.create_user(username=f'buyer{i}', password='race-pass')
+        CartItem.objects.create(cart=Cart.objects.create(user=user), book=book, quantity=1)
+        users.append(user)
+
+    results = Counter()
+    barrier = threading.Barrier(buyers)
+
+    def buy(user):
+        barrier.wait()
+        try:
+            place_order(user)
+            results['order placed'] += 1
+        except CheckoutError:
+            results['out of stock'] += 1
+        except Exception as e:
+            results[f'{type(e).__name__}: {e}'] += 1
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=buy, args=(user,)) for user in users]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    book.refresh_from_db()
+    for outcome, count in results.items():
+        print(f"{outcome:<40}{count:>4}")
+    print(f"Final stock: {book.stock_quantity}, orders: {Order.objects.count()}")
+    return book.stock_quantity == 0 and Order.objects.count() == 1 and results['order placed'] == 1
+
+if __name__ == "__main__":
+    sys.exit(0 if main(int(sys.argv[1]) if len(sys.argv) > 1 else 16) else 1)
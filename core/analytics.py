@@ -0,0 +1,174 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from django.db import connection, transaction
+from django.db.models import Count, DecimalField, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from .models import DailyBookSales, DailyCategorySales, DailySales, OrderItem
+
+# Orders whose payment went through; pending and cancelled ones are not sales
+SOLD_STATUSES = ('confirmed', 'shipped', 'delivered')
+SALES_DASHBOARD_DAYS = 30
+ROLLUP_BATCH_SIZE = 5000
+
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+
+# Daily rollups: one row per day, per (day, book) and per (day, category).
+# A confirmed order adds its lines to them in the same transaction as the
+# status change, so the dashboard sums a few rows per day instead of
+# scanning OrderItem. Writes that skip record_order (Django admin edits,
+# bulk loads) are caught up by rebuild_rollups.
+
+def _add(model, keys, rows):
+    """Add ``rows`` to the counters of ``model``, creating missing rows, in one statement.
+
+    INSERT ... ON CONFLICT DO UPDATE (SQLite 3.24+, Postgres) increments in
+    place, so concurrent confirmations of orders on the same day cannot lose
+    an update.
+    """
+    if not rows:
+        return
+    qn = connection.ops.quote_name
+    table = qn(model._meta.db_table)
+    columns = list(rows[0])
+    placeholders = ', '.join(['(' + ', '.join(['%s'] * len(columns)) + ')'] * len(rows))
+    updates = ', '.join(
+        f'{qn(column)} = {table}.{qn(column)} + excluded.{qn(column)}' for column in columns if column not in keys
+    )
+    params = []
+    for row in rows:
+        params += [
+            connection.ops.adapt_datefield_value(value) if column == 'day' else value
+            for column, value in row.items()
+        ]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} ({', '.join(qn(column) for column in columns)}) VALUES {placeholders} "
+            f"ON CONFLICT ({', '.join(qn(key) for key in keys)}) DO UPDATE SET {updates}",
+            params,
+        )
+
+def record_order(order, lines=None):
+    """Add a confirmed ``order`` to the rollups of the day it was placed.
+
+    ``lines`` are ``(book_id, category_id, quantity, price)`` tuples, read
+    from the database when not given. Call it once per order, inside the
+    transaction that confirms it.
+    """
+    if lines is None:
+        lines = OrderItem.objects.filter(order=order).values_list('book_id', 'book__category_id', 'quantity', 'price')
+    day = timezone.localdate(order.created_at)
+    by_book = defaultdict(lambda: [0, Decimal('0')])
+    by_category = defaultdict(lambda: [0, Decimal('0')])
+    for book_id, category_id, quantity, price in lines:
+        for totals in (by_book[book_id], by_category[category_id]):
+            totals[0] += quantity
+            totals[1] += price * quantity
+    if not by_book:
+        return
+
+    with transaction.atomic():
+        _add(DailySales, ['day'], [{
+            'day': day, 'orders': 1,
+            'quantity': sum(quantity for quantity, _ in by_book.values()),
+            'revenue': sum(revenue for _, revenue in by_book.values()),
+        }])
+        _add(DailyBookSales, ['day', 'book_id'], [
+            {'day': day, 'book_id': book_id, 'orders': 1, 'quantity': quantity, 'revenue': revenue}
+            for book_id, (quantity, revenue) in by_book.items()
+        ])
+        _add(DailyCategorySales, ['day', 'category_id'], [
+            {'day': day, 'category_id': category_id, 'orders': 1, 'quantity': quantity, 'revenue': revenue}
+            for category_id, (quantity, revenue) in by_category.items()
+        ])
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+def rebuild_rollups(start=None, end=None, batch_size=ROLLUP_BATCH_SIZE):
+    """Recompute the rollups of the days from ``start`` to ``end`` (included, default all) from the orders.
+
+    Returns the number of rows written.
+    """
+    lines = OrderItem.objects.filter(order__status__in=SOLD_STATUSES)
+    days = {}
+    if start:
+        lines = lines.filter(order__created_at__gte=_day_start(start))
+        days['day__gte'] = start
+    if end:
+        lines = lines.filter(order__created_at__lt=_day_start(end + timedelta(days=1)))
+        days['day__lte'] = end
+    lines = lines.annotate(day=TruncDate('order__created_at')).order_by()
+    # Named apart from the OrderItem fields, which F() would otherwise not reach
+    totals = {
+        'order_count': Count('order_id', distinct=True),
+        'copies': Sum('quantity'),
+        'amount': Sum(F('price') * F('quantity'), output_field=MONEY),
+    }
+
+    written = 0
+    with transaction.atomic():
+        for model, group, key in (
+            (DailySales, None, None),
+            (DailyBookSales, 'book_id', 'book_id'),
+            (DailyCategorySales, 'book__category_id', 'category_id'),
+        ):
+            model.objects.filter(**days).delete()
+            fields = ['day', group] if group else ['day']
+            batch = []
+            for row in lines.values(*fields).annotate(**totals).iterator(chunk_size=batch_size):
+                rollup = model(day=row['day'], orders=row['order_count'], quantity=row['copies'], revenue=row['amount'])
+                if key:
+                    setattr(rollup, key, row[group])
+                batch.append(rollup)
+                if len(batch) >= batch_size:
+                    model.objects.bulk_create(batch)
+                    written += len(batch)
+                    batch = []
+            model.objects.bulk_create(batch)
+            written += len(batch)
+    return written
+
+def sales_dashboard(days=SALES_DASHBOARD_DAYS, top=10):
+    """Revenue per day, best-selling books and revenue per category over the last ``days`` days.
+
+    Three queries over the rollups, whose size depends on the number of
+    days (times books or categories sold per day), not on the number of orders.
+    """
+    today = timezone.localdate()
+    start = today - timedelta(days=days - 1)
+    per_day = {row.day: row for row in DailySales.objects.filter(day__gte=start)}
+    timeline = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        row = per_day.get(day)
+        timeline.append({
+            'day': day,
+            'orders': row.orders if row else 0,
+            'revenue': row.revenue if row else Decimal('0'),
+        })
+    best = max((entry['revenue'] for entry in timeline), default=0) or 1
+    for entry in timeline:
+        entry['percent'] = round(100 * entry['revenue'] / best)
+
+    top_books = list(
+        DailyBookSales.objects.filter(day__gte=start)
+        .values('book_id', 'book__title')
+        .annotate(quantity=Sum('quantity'), revenue=Sum('revenue'))
+        .order_by('-quantity', '-revenue')[:top]
+    )
+    categories = list(
+        DailyCategorySales.objects.filter(day__gte=start)
+        .values('category__name')
+        .annotate(orders=Sum('orders'), revenue=Sum('revenue'))
+        .order_by('-revenue')
+    )
+    return {
+        'days': days,
+        'timeline': timeline,
+        'orders': sum(entry['orders'] for entry in timeline),
+        'revenue': sum(entry['revenue'] for entry in timeline),
+        'top_books': top_books,
+        'categories': categories,
+    }
@@ -5,4 +5,5 @@ class CoreConfig(AppConfig):
     name = 'core'
     
     def ready(self):
+        import core.db
         import core.signals
\ No newline at end of file
@@ -0,0 +1,63 @@
+from decimal import Decimal
+from django.core.cache import cache
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum, Value
+from django.db.models.functions import Coalesce
+from .models import Cart, CartItem
+
+CART_SUMMARY_TIMEOUT = 60 * 15
+
+# Cart ids are cached per user; NO_CART marks users who have not created one yet
+NO_CART = 0
+
+MONEY = DecimalField(max_digits=12, decimal_places=2)
+
+def line_total():
+    return ExpressionWrapper(F('book__price') * F('quantity'), output_field=MONEY)
+
+def _cart_key(user_id):
+    return f'cart_id:{user_id}'
+
+def _summary_key(cart_id):
+    return f'cart_summary:{cart_id}'
+
+def empty_summary():
+    return {'count': 0, 'total': Decimal('0.00')}
+
+def get_cart_id(user):
+    cart_id = cache.get(_cart_key(user.pk))
+    if cart_id is None:
+        cart_id = Cart.objects.filter(user=user).values_list('id', flat=True).first() or NO_CART
+        cache.set(_cart_key(user.pk), cart_id, None)
+    return cart_id
+
+def get_cart_summary(user):
+    """Number of lines and total price of the user's cart, cached until the cart changes."""
+    if not user.is_authenticated:
+        return empty_summary()
+    cart_id = get_cart_id(user)
+    if cart_id == NO_CART:
+        return empty_summary()
+
+    summary = cache.get(_summary_key(cart_id))
+    if summary is None:
+        summary = CartItem.objects.filter(cart_id=cart_id).aggregate(
+            count=Count('id'),
+            total=Coalesce(Sum(line_total()), Value(Decimal('0.00')), output_field=MONEY),
+        )
+        cache.set(_summary_key(cart_id), summary, CART_SUMMARY_TIMEOUT)
+    return summary
+
+def cart_lines(user):
+    """Cart items with their book and author in one query, line totals computed in SQL."""
+    return (
+        CartItem.objects.filter(cart__user=user)
+        .select_related('book__author')
+        .annotate(line_total=line_total())
+        .order_by('added_at', 'id')
+    )
+
+def invalidate_cart_summary(*cart_ids):
+    cache.delete_many([_summary_key(cart_id) for cart_id in cart_ids])
+
+def forget_cart_id(user_id):
+    cache.delete(_cart_key(user_id))
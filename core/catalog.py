@@ -0,0 +1,93 @@
+import time
+from django.core.cache import cache
+from .models import Book, Category
+
+CATALOG_CACHE_TIMEOUT = 60 * 60
+
+# Cached reads are keyed on a generation number per kind of data: bumping the
+# generation invalidates every key of that kind at once, old keys just expire.
+
+def _generation(name):
+    return cache.get_or_set(f'catalog_gen:{name}', time.time_ns, None)
+
+def _bump(name):
+    try:
+        cache.incr(f'catalog_gen:{name}')
+    except ValueError:
+        # Evicted: a fresh timestamp cannot collide with an older generation
+        cache.set(f'catalog_gen:{name}', time.time_ns(), None)
+
+def _book_key(book_id):
+    return f"catalog:book:{_generation('books')}:{book_id}"
+
+def _count(stat):
+    key = f'catalog_stats:{stat}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+def _cached(key, compute):
+    value = cache.get(key)
+    if value is None:
+        _count('misses')
+        value = compute()
+        cache.set(key, value, CATALOG_CACHE_TIMEOUT)
+    else:
+        _count('hits')
+    return value
+
+def get_categories():
+    return _cached(f"catalog:categories:{_generation('categories')}", lambda: list(Category.objects.all()))
+
+def get_book(book_id):
+    """Book with its author and category; raises ``Book.DoesNotExist``."""
+    return _cached(
+        _book_key(book_id),
+        lambda: Book.objects.select_related('author', 'category').get(pk=book_id),
+    )
+
+def in_stock_count(category_id=None):
+    """Number of books in stock, in ``category_id`` or in the whole catalog."""
+    def count():
+        books = Book.objects.filter(stock_quantity__gt=0)
+        if category_id:
+            books = books.filter(category_id=category_id)
+        return books.count()
+    return _cached(f"catalog:count:{_generation('counts')}:{category_id or 'all'}", count)
+
+def catalog_version():
+    """Changes whenever a book, author or category changes; used for ETags."""
+    return _generation('catalog')
+
+def cache_stats():
+    stats = cache.get_many(['catalog_stats:hits', 'catalog_stats:misses'])
+    hits, misses = stats.get('catalog_stats:hits', 0), stats.get('catalog_stats:misses', 0)
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(100 * hits / (hits + misses)) if hits + misses else None,
+    }
+
+# Invalidation, called from core.signals and after bulk stock updates
+
+def invalidate_books(*book_ids):
+    cache.delete_many([_book_key(book_id) for book_id in book_ids])
+    _bump('counts')
+    _bump('catalog')
+
+def invalidate_categories():
+    # Book details show their category name
+    _bump('categories')
+    _bump('books')
+    _bump('catalog')
+
+def invalidate_catalog():
+    # After bulk loads that skip signals
+    for name in ('counts', 'categories', 'books', 'catalog'):
+        _bump(name)
+
+def invalidate_catalog_order():
+    # The shuffled order changed, nothing else did
+    _bump('catalog')
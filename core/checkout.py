@@ -0,0 +1,88 @@
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+from .models import Book, Cart, CartItem, Order, OrderItem
+from .catalog import invalidate_books
+from .analytics import SOLD_STATUSES, record_order
+
+class CheckoutError(Exception):
+    pass
+
+class EmptyCartError(CheckoutError):
+    def __init__(self):
+        super().__init__('Your cart is empty.')
+
+class InsufficientStockError(CheckoutError):
+    def __init__(self, book):
+        self.book = book
+        super().__init__(f'Insufficient stock for {book.title}.')
+
+def _per_book(quantities):
+    return Case(
+        *[When(pk=book_id, then=Value(quantity)) for book_id, quantity in quantities.items()],
+        output_field=IntegerField(),
+    )
+
+def reserve_stock(quantities):
+    """Decrement stock for ``{book_id: quantity}`` in one conditional UPDATE.
+
+    A row is only updated if it still has enough copies, so two checkouts
+    racing for the last copy cannot both succeed: if fewer rows than books
+    were updated, the update is rolled back and the short book reported.
+    """
+    wanted = _per_book(quantities)
+    try:
+        with transaction.atomic():
+            updated = Book.objects.filter(
+                pk__in=quantities.keys(),
+                stock_quantity__gte=wanted,
+            ).update(stock_quantity=F('stock_quantity') - wanted, updated_at=timezone.now())
+            if updated != len(quantities):
+                raise CheckoutError('Insufficient stock.')
+    except CheckoutError:
+        # The savepoint is rolled back, so stock is as it was before the update
+        short = Book.objects.filter(pk__in=quantities.keys(), stock_quantity__lt=wanted).first()
+        if short is None:
+            raise CheckoutError('A book in your cart is no longer available.')
+        raise InsufficientStockError(short)
+
+def place_order(user, shipping_address=None, status='confirmed'):
+    """Turn the user's cart into an order.
+
+    Runs in a single transaction with a fixed number of queries whatever the
+    size of the cart: lock and load the cart, reserve stock, insert the order,
+    bulk insert its items and empty the cart. Raises a ``CheckoutError`` and leaves
+    everything untouched when the cart is empty or a book is short.
+    """
+    with transaction.atomic():
+        # Writing first takes the write lock up front: on SQLite a transaction
+        # that reads and then writes cannot wait for a busy lock and fails with
+        # "database is locked", and on Postgres it serialises double submits.
+        Cart.objects.filter(user=user).update(updated_at=timezone.now())
+        cart_items = list(CartItem.objects.filter(cart__user=user).select_related('book'))
+        if not cart_items:
+            raise EmptyCartError()
+
+        quantities = {}
+        for item in cart_items:
+            quantities[item.book_id] = quantities.get(item.book_id, 0) + item.quantity
+        reserve_stock(quantities)
+        # The conditional UPDATE bypasses the Book signals
+        transaction.on_commit(lambda: invalidate_books(*quantities))
+
+        order = Order.objects.create(
+            user=user,
+            total_amount=sum(item.book.price * item.quantity for item in cart_items),
+            status=status,
+            shipping_address=shipping_address if shipping_address is not None else user.address,
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, book_id=item.book_id, quantity=item.quantity, price=item.book.price)
+            for item in cart_items
+        ])
+        CartItem.objects.filter(pk__in=[item.pk for item in cart_items]).delete()
+        if status in SOLD_STATUSES:
+            record_order(order, [
+                (item.book_id, item.book.category_id, item.quantity, item.book.price) for item in cart_items
+            ])
+    return order
@@ -9,6 +9,9 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'BookHub.settings')
 django.setup()
 
 from core.models import Category, Author, Book
+from core.reset import clear_catalog
+import argparse
+import time
 
 def clear_all_books():
     print("Deleting all books...")
@@ -33,9 +36,27 @@ def clear_all_books():
     
     print("\nDeletion complete! The database is now empty.")
 
+def fast_clear_all_books(remove_covers=False):
+    stats = clear_catalog(remove_covers=remove_covers)
+    for step, seconds in stats.timings.items():
+        rows = stats.deleted.get(step)
+        detail = f"{rows} rows" if rows is not None else f"{stats.covers} files, {stats.cover_bytes / 1e6:.1f} MB"
+        print(f"✓ {step}: {detail} in {seconds:.2f}s")
+    print(f"\nDeletion complete in {stats.elapsed:.2f}s! The database is now empty.")
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Delete every book, author and category")
+    parser.add_argument('--fast', action='store_true', help="Batched raw DELETEs instead of the ORM cascade")
+    parser.add_argument('--remove-covers', action='store_true', help="Also delete the cover files no book uses (with --fast)")
+    args = parser.parse_args()
+
     confirmation = input("Are you sure you want to delete ALL books? (yes/no): ")
     if confirmation.lower() in ['yes', 'y', 'oui', 'o']:
-        clear_all_books()
+        if args.fast:
+            fast_clear_all_books(remove_covers=args.remove_covers)
+        else:
+            start = time.perf_counter()
+            clear_all_books()
+            print(f"Took {time.perf_counter() - start:.2f}s")
     else:
         print("Deletion cancelled.")
\ No newline at end of file
@@ -0,0 +1,61 @@
+import hashlib
+from datetime import datetime
+from django.contrib.messages import get_messages
+from .cart import get_cart_summary
+from .catalog import catalog_version, get_book
+from .models import Book
+from .recommendations import last_refresh, request_recommendations
+
+# ETag and Last-Modified functions for django.views.decorators.http.condition.
+# Pages also show who is logged in and their cart badge, so the viewer is part
+# of every ETag. Pending flash messages disable conditional responses so they
+# are not swallowed by a 304.
+
+def _digest(*parts):
+    return hashlib.md5(':'.join(str(part) for part in parts).encode(), usedforsecurity=False).hexdigest()
+
+def _viewer(request):
+    user = request.user
+    if not user.is_authenticated:
+        return 'anonymous'
+    return _digest(user.pk, user.username, user.role, user.is_superuser, get_cart_summary(user)['count'])
+
+def _has_messages(request):
+    return len(get_messages(request)) > 0
+
+def catalog_etag(request, *args, **kwargs):
+    if _has_messages(request):
+        return None
+    return _digest(catalog_version(), request.get_full_path(), _viewer(request))
+
+def search_etag(request, *args, **kwargs):
+    # JSON search results are the same for every viewer
+    return _digest(catalog_version(), request.get_full_path())
+
+def book_etag(request, book_id):
+    if _has_messages(request):
+        return None
+    try:
+        book = get_book(book_id)
+    except Book.DoesNotExist:
+        return None
+    # The page also shows a card for each recommended book
+    recommended = [
+        f'{r.recommended_id}@{r.recommended.updated_at.isoformat()}' for r in request_recommendations(request, book_id)
+    ]
+    return _digest(book.pk, book.updated_at.isoformat(), last_refresh(), *recommended, _viewer(request))
+
+def book_last_modified(request, book_id):
+    # Only the anonymous page depends on nothing but the book
+    if request.user.is_authenticated or _has_messages(request):
+        return None
+    try:
+        updated_at = get_book(book_id).updated_at
+    except Book.DoesNotExist:
+        return None
+    # The "customers also bought" list changes with each refresh and with its books
+    versions = [updated_at] + [r.recommended.updated_at for r in request_recommendations(request, book_id)]
+    refreshed = last_refresh()
+    if refreshed:
+        versions.append(datetime.fromisoformat(refreshed))
+    return max(versions)
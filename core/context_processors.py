@@ -0,0 +1,9 @@
+from django.utils.functional import SimpleLazyObject
+from .cart import get_cart_summary
+
+def cart_summary(request):
+    """Cart badge data for the header, only computed if a template uses it."""
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {}
+    return {'cart_summary': SimpleLazyObject(lambda: get_cart_summary(user))}
@@ -0,0 +1,46 @@
+from django.db import transaction
+from django.db.models import F
+from .models import Book, Category, Counter, Order, User
+
+# Row counts shown on the admin panel. count() is a full scan on SQLite, so
+# signals adjust a stored value on every insert and delete instead. Writes
+# that skip signals (bulk_create, raw DELETEs, loads from another process)
+# call reconcile(), which the reconcile_counters command also runs.
+COUNTED_MODELS = {
+    'users': User,
+    'books': Book,
+    'orders': Order,
+    'categories': Category,
+}
+
+def adjust(name, delta):
+    """Add ``delta`` to the counter ``name``, counting the table if the counter does not exist yet."""
+    # A single UPDATE, so concurrent writers add up instead of overwriting each other
+    if not Counter.objects.filter(name=name).update(value=F('value') + delta):
+        reconcile([name])
+
+def reconcile(names=None):
+    """Recount the tables of ``names`` (default all) and store the exact values.
+
+    Returns ``{name: (stored, actual)}`` for the counters that had drifted,
+    ``stored`` being ``None`` for counters that did not exist.
+    """
+    names = list(names or COUNTED_MODELS)
+    drift = {}
+    with transaction.atomic():
+        stored = dict(Counter.objects.select_for_update().filter(name__in=names).values_list('name', 'value'))
+        for name in names:
+            actual = COUNTED_MODELS[name].objects.count()
+            if stored.get(name) != actual:
+                drift[name] = (stored.get(name), actual)
+                Counter.objects.update_or_create(name=name, defaults={'value': actual})
+    return drift
+
+def get_counts():
+    """All the counters, in one query."""
+    counts = dict(Counter.objects.filter(name__in=COUNTED_MODELS).values_list('name', 'value'))
+    missing = COUNTED_MODELS.keys() - counts.keys()
+    if missing:
+        # Created by the migration; recount any that were deleted since
+        counts.update((name, actual) for name, (_, actual) in reconcile(sorted(missing)).items())
+    return counts
@@ -0,0 +1,292 @@
+import random
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import timedelta
+from decimal import Decimal
+from itertools import accumulate
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+from .analytics import rebuild_rollups
+from .catalog import invalidate_catalog
+from .counters import reconcile
+from .recommendations import rebuild_recommendations
+from .models import Author, Book, Cart, CartItem, Category, Order, OrderItem, User
+from .search import rebuild_index
+
+# Synthetic data for load tests and benchmarks. Everything is drawn from a
+# seeded random.Random, so a seed always produces the same catalog and orders
+# (timestamps are relative to the time of the run).
+
+GENRES = [
+    'Literature', 'Science Fiction', 'Fantasy', 'Crime and Thrillers', 'History', 'Biography',
+    'Science and Technology', 'Economics and Management', 'Personal Development', 'Children',
+    'Languages', 'Arts and Culture', 'Religion and Spirituality', 'Travel', 'Cooking', 'Poetry',
+]
+FIRST_NAMES = [
+    'Amina', 'Brian', 'Chloé', 'David', 'Esther', 'Faith', 'Grace', 'Hassan', 'Irene', 'James',
+    'Kevin', 'Lucie', 'Mary', 'Njeri', 'Otieno', 'Paul', 'Rose', 'Samuel', 'Wanjiru', 'Yusuf',
+]
+LAST_NAMES = [
+    'Achieng', 'Bernard', 'Chebet', 'Dubois', 'Kamau', 'Kariuki', 'Martin', 'Mwangi', 'Njoroge',
+    'Ochieng', 'Odhiambo', 'Petit', 'Robert', 'Smith', 'Wafula', 'Wambui', 'Wekesa', 'Williams',
+]
+TITLE_ADJECTIVES = [
+    'Silent', 'Hidden', 'Last', 'Golden', 'Broken', 'Forgotten', 'Endless', 'Little', 'Secret',
+    'Wild', 'Distant', 'Burning', 'Quiet', 'Practical', 'Modern', 'Complete',
+]
+TITLE_NOUNS = [
+    'River', 'Garden', 'Kingdom', 'Journey', 'Mountain', 'Letters', 'City', 'Habits', 'Storm',
+    'Harvest', 'Market', 'Memory', 'Savanna', 'Guide', 'Voyage', 'Promise', 'Algorithm', 'Empire',
+]
+
+# Relative frequencies of the number of lines in an order (1 to 6) and of the
+# quantity on a line (1 to 4)
+ORDER_SIZE_WEIGHTS = [35, 25, 18, 10, 7, 5]
+QUANTITY_WEIGHTS = [80, 14, 4, 2]
+STATUS_WEIGHTS = {'pending': 5, 'confirmed': 15, 'shipped': 15, 'delivered': 58, 'cancelled': 7}
+
+DATASET_BATCH_SIZE = 5000
+DATASET_PASSWORD = 'bookhub-load'
+
+def zipf_cum_weights(count, exponent):
+    """Cumulative weights of ranks 1..count under a Zipf law, for ``Random.choices``."""
+    return list(accumulate(1 / rank ** exponent for rank in range(1, count + 1)))
+
+@contextmanager
+def _explicit_timestamps(*models):
+    """Let bulk_create keep generated ``auto_now``/``auto_now_add`` values instead of the current time."""
+    fields = [f for model in models for f in model._meta.concrete_fields
+              if getattr(f, 'auto_now', False) or getattr(f, 'auto_now_add', False)]
+    saved = [(f, f.auto_now, f.auto_now_add) for f in fields]
+    for f in fields:
+        f.auto_now = f.auto_now_add = False
+    try:
+        yield
+    finally:
+        for f, auto_now, auto_now_add in saved:
+            f.auto_now, f.auto_now_add = auto_now, auto_now_add
+
+@dataclass
+class DatasetStats:
+    categories: int = 0
+    authors: int = 0
+    books: int = 0
+    users: int = 0
+    carts: int = 0
+    cart_items: int = 0
+    orders: int = 0
+    order_items: int = 0
+    started: float = field(default_factory=time.perf_counter)
+
+    @property
+    def rows(self):
+        return (self.categories + self.authors + self.books + self.users
+                + self.carts + self.cart_items + self.orders + self.order_items)
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def rate(self):
+        return self.rows / self.elapsed if self.elapsed else 0
+
+class DatasetGenerator:
+    """Bulk-insert a seeded synthetic catalog, customers, carts and order history.
+
+    Book sales, author output and category sizes follow Zipf laws, so a few
+    bestsellers dominate as in a real shop; some customers also order far
+    more often than others. Orders are spread evenly over the last ``days``
+    days in id order, with multi-line carts and quantities.
+
+    Rows are inserted with ``bulk_create`` in batches of ``batch_size``, one
+    transaction per batch. Signals are skipped, so ``finish()`` rebuilds the
+    search index, the sales rollups, the admin counters and the
+    recommendations and invalidates the catalog caches.
+    """
+
+    def __init__(self, seed=0, categories=12, authors=300, books=5000, users=1000, order_items=50000,
+                 cart_ratio=0.2, days=365, zipf=1.1, batch_size=DATASET_BATCH_SIZE, progress=None):
+        self.seed = seed
+        self.counts = {'categories': categories, 'authors': authors, 'books': books, 'users': users}
+        self.order_items = order_items
+        self.cart_ratio = cart_ratio
+        self.days = days
+        self.zipf = zipf
+        self.batch_size = batch_size
+        self.progress = progress
+        self.rng = random.Random(seed)
+        self.now = timezone.now()
+        self.stats = DatasetStats()
+        # Prefix of the generated usernames, ISBNs and order numbers
+        self.tag = f'{seed % 1000:03d}'
+
+    def run(self):
+        if User.objects.filter(username__startswith=f'load{self.tag}-').exists():
+            raise ValueError(f"A dataset was already generated with seed {self.seed} in this database")
+        if not all(self.counts.values()):
+            raise ValueError("Categories, authors, books and users must all be at least 1")
+        with _explicit_timestamps(Book, User, Cart, CartItem, Order):
+            self._categories()
+            self._authors()
+            self._books()
+            self._users()
+            self._carts()
+            self._orders()
+        self.finish()
+        return self.stats
+
+    def _report(self):
+        if self.progress:
+            self.progress(self.stats)
+
+    def _insert(self, model, objs, stat):
+        objs = list(objs)
+        for start in range(0, len(objs), self.batch_size):
+            with transaction.atomic():
+                batch = model.objects.bulk_create(objs[start:start + self.batch_size])
+            setattr(self.stats, stat, getattr(self.stats, stat) + len(batch))
+            self._report()
+        return objs
+
+    def _date(self, start_days_ago, end_days_ago):
+        return self.now - timedelta(days=self.rng.uniform(end_days_ago, start_days_ago))
+
+    def _categories(self):
+        names = [GENRES[i % len(GENRES)] + (f' {i // len(GENRES) + 1}' if i >= len(GENRES) else '')
+                 for i in range(self.counts['categories'])]
+        # Genres may already exist: reuse them
+        Category.objects.bulk_create([Category(name=name) for name in names], ignore_conflicts=True)
+        ids = dict(Category.objects.filter(name__in=names).values_list('name', 'id'))
+        self.category_ids = [ids[name] for name in names]
+        self.stats.categories = len(names)
+
+    def _authors(self):
+        rng = self.rng
+        authors = self._insert(Author, (
+            Author(name=f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}')
+            for _ in range(self.counts['authors'])
+        ), 'authors')
+        self.author_ids = [author.pk for author in authors]
+
+    def _books(self):
+        rng = self.rng
+        author_weights = zipf_cum_weights(len(self.author_ids), 1.0)
+        category_weights = zipf_cum_weights(len(self.category_ids), 0.8)
+        count = self.counts['books']
+        authors = rng.choices(self.author_ids, cum_weights=author_weights, k=count)
+        categories = rng.choices(self.category_ids, cum_weights=category_weights, k=count)
+        books = []
+        for i in range(count):
+            created = self._date(self.days * 2, 0)
+            books.append(Book(
+                title=f'The {rng.choice(TITLE_ADJECTIVES)} {rng.choice(TITLE_NOUNS)}'
+                      + (f', Volume {rng.randint(2, 9)}' if rng.random() < 0.1 else ''),
+                author_id=authors[i], category_id=categories[i],
+                isbn=f'7{self.tag}{i:09d}',
+                description=f'A {rng.choice(TITLE_ADJECTIVES).lower()} story about {rng.choice(TITLE_NOUNS).lower()}s.',
+                price=Decimal(rng.randrange(300, 4000, 50)),
+                stock_quantity=0 if rng.random() < 0.05 else rng.randint(1, 200),
+                shuffle_key=rng.getrandbits(62),
+                created_at=created, updated_at=created,
+            ))
+        books = self._insert(Book, books, 'books')
+        self.book_ids = [book.pk for book in books]
+        self.book_prices = [book.price for book in books]
+        # Popularity rank -> book, so bestsellers are spread over the catalog
+        self.by_popularity = list(range(len(books)))
+        rng.shuffle(self.by_popularity)
+        self.book_weights = zipf_cum_weights(len(books), self.zipf)
+
+    def _users(self):
+        rng = self.rng
+        password = make_password(DATASET_PASSWORD)
+        users = []
+        for i in range(self.counts['users']):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            joined = self._date(self.days * 2, self.days)
+            username = f'load{self.tag}-{i:07d}'
+            users.append(User(
+                username=username, email=f'{username}@example.com', password=password,
+                first_name=first, last_name=last, phone_number=f'07{rng.randint(0, 99999999):08d}',
+                address=f'{rng.randint(1, 999)} {rng.choice(LAST_NAMES)} Road, Nairobi',
+                date_joined=joined, created_at=joined,
+            ))
+        users = self._insert(User, users, 'users')
+        self.users = [(user.pk, user.address) for user in users]
+        self.user_weights = zipf_cum_weights(len(users), 0.7)
+
+    def _pick_books(self, lines):
+        """``lines`` distinct book indexes, drawn by popularity."""
+        picked = set()
+        while len(picked) < min(lines, len(self.book_ids)):
+            rank = self.rng.choices(range(len(self.book_ids)), cum_weights=self.book_weights)[0]
+            picked.add(self.by_popularity[rank])
+        return picked
+
+    def _carts(self):
+        rng = self.rng
+        owners = rng.sample(self.users, round(len(self.users) * self.cart_ratio))
+        carts = []
+        for user_id, _ in owners:
+            updated = self._date(30, 0)
+            carts.append(Cart(user_id=user_id, created_at=updated, updated_at=updated))
+        carts = self._insert(Cart, carts, 'carts')
+        items = []
+        for cart in carts:
+            for index in self._pick_books(rng.randint(1, 5)):
+                items.append(CartItem(
+                    cart=cart, book_id=self.book_ids[index], quantity=rng.choices(range(1, 5), QUANTITY_WEIGHTS)[0],
+                    added_at=cart.updated_at,
+                ))
+        self._insert(CartItem, items, 'cart_items')
+
+    def _orders(self):
+        rng = self.rng
+        statuses, status_weights = list(STATUS_WEIGHTS), list(STATUS_WEIGHTS.values())
+        mean_lines = sum(n * w for n, w in enumerate(ORDER_SIZE_WEIGHTS, 1)) / sum(ORDER_SIZE_WEIGHTS)
+        expected_orders = max(1, round(self.order_items / mean_lines))
+        step = timedelta(days=self.days) / expected_orders
+        created = self.now - timedelta(days=self.days)
+        remaining = self.order_items
+        while remaining > 0:
+            orders, lines = [], []
+            while remaining > 0 and len(orders) < self.batch_size:
+                user_id, address = self.users[rng.choices(range(len(self.users)), cum_weights=self.user_weights)[0]]
+                picked = self._pick_books(min(remaining, rng.choices(range(1, 7), ORDER_SIZE_WEIGHTS)[0]))
+                created = min(created + step * rng.uniform(0.5, 1.5), self.now)
+                order_lines = [
+                    (index, rng.choices(range(1, 5), QUANTITY_WEIGHTS)[0]) for index in sorted(picked)
+                ]
+                order = Order(
+                    user_id=user_id, order_number=f'ORD-S{self.tag}-{self.stats.orders + len(orders):09d}',
+                    total_amount=sum(self.book_prices[index] * quantity for index, quantity in order_lines),
+                    status=rng.choices(statuses, status_weights)[0], shipping_address=address,
+                    created_at=created, updated_at=created,
+                )
+                orders.append(order)
+                lines.extend((order, index, quantity) for index, quantity in order_lines)
+                remaining -= len(order_lines)
+            with transaction.atomic():
+                Order.objects.bulk_create(orders)
+                OrderItem.objects.bulk_create(
+                    [OrderItem(order=order, book_id=self.book_ids[index], quantity=quantity,
+                               price=self.book_prices[index])
+                     for order, index, quantity in lines],
+                    batch_size=self.batch_size,
+                )
+            self.stats.orders += len(orders)
+            self.stats.order_items += len(lines)
+            self._report()
+
+    def finish(self):
+        rebuild_index()
+        rebuild_rollups()
+        reconcile()
+        rebuild_recommendations()
+        invalidate_catalog()
+
+def generate_dataset(**options):
+    return DatasetGenerator(**options).run()
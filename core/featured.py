@@ -0,0 +1,38 @@
+from django.db import transaction
+from .models import Book, random_shuffle_key
+from .catalog import invalidate_catalog_order
+
+FEATURED_COUNT = 8
+
+def featured_books(queryset, count=FEATURED_COUNT):
+    """Pick ``count`` random-looking books in O(count).
+
+    Instead of ``order_by('?')``, which sorts the whole table, start at a
+    random point of the precomputed ``shuffle_key`` order and read forward,
+    wrapping around to the beginning if needed. At most two index range scans.
+    """
+    start = random_shuffle_key()
+    books = list(queryset.filter(shuffle_key__gte=start).order_by('shuffle_key')[:count])
+    if len(books) < count:
+        seen = [book.id for book in books]
+        books += list(queryset.exclude(id__in=seen).order_by('shuffle_key')[:count - len(books)])
+    return books
+
+def reshuffle_catalog(batch_size=1000):
+    """Draw a fresh random order for the whole catalog and return the book count."""
+    total = 0
+    batch = []
+    with transaction.atomic():
+        # Walk by primary key: scanning the shuffle_key index while rewriting it would revisit rows
+        for book in Book.objects.only('id').order_by('pk').iterator(chunk_size=batch_size):
+            book.shuffle_key = random_shuffle_key()
+            batch.append(book)
+            if len(batch) >= batch_size:
+                Book.objects.bulk_update(batch, ['shuffle_key'])
+                total += len(batch)
+                batch = []
+        if batch:
+            Book.objects.bulk_update(batch, ['shuffle_key'])
+            total += len(batch)
+        transaction.on_commit(invalidate_catalog_order)
+    return total
@@ -1,7 +1,10 @@
+import logging
 from django import forms
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from .models import User, Book, Category, Author
 
+logger = logging.getLogger(__name__)
+
 class UserRegistrationForm(UserCreationForm):
     email = forms.EmailField(
         required=True,
@@ -77,27 +80,24 @@ class BookForm(forms.ModelForm):
         }
     
     def save(self, commit=True):
-        from .utils import create_book_cover
+        from .tasks import enqueue_cover_render
         import random
         
-        print(f"Form data: {self.data}")
-        print(f"Cleaned data: {self.cleaned_data}")
-        
         # Get author
         author_name = self.cleaned_data.get('author_name')
-        print(f"Author name: {author_name}")
         if not author_name:
             raise ValueError("Author name is required")
         author, created = Author.objects.get_or_create(name=author_name)
-        print(f"Author: {author} (created: {created})")
+        if created:
+            logger.info("Created author %s", author)
         
         # Get category from dropdown
         selected_category = self.data.get('selected_category')
-        print(f"Selected category: {selected_category}")
         if not selected_category:
             raise ValueError("Please select a category")
         category, created = Category.objects.get_or_create(name=selected_category)
-        print(f"Category: {category} (created: {created})")
+        if created:
+            logger.info("Created category %s", category)
         
         # Create book instance
         book = super().save(commit=False)
@@ -108,19 +108,11 @@ class BookForm(forms.ModelForm):
         if not book.isbn:
             book.isbn = f"9{random.randint(100000000000, 999999999999)}"
         
-        print(f"Book before save: {book.title} - {book.author} - {book.category}")
-        
         if commit:
             book.save()
-            print(f"Book saved with ID: {book.id}")
-            # Generate cover
-            try:
-                cover_path = create_book_cover(book.title, author_name, category.name, book.isbn)
-                book.cover_image = cover_path
-                book.save()
-                print(f"Cover created: {cover_path}")
-            except Exception as e:
-                print(f"Error creating cover: {e}")
+            # Cover is rendered in the background, the catalog shows a placeholder meanwhile
+            enqueue_cover_render(book)
+            logger.info("Book %s saved, cover render queued", book.id)
         
         return book
 
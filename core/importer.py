@@ -0,0 +1,245 @@
+import csv
+import json
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from .cart import invalidate_cart_summary
+from .catalog import invalidate_catalog
+from .counters import reconcile
+from .models import Author, Book, CartItem, Category
+from .search import rebuild_index
+from .utils import create_book_cover
+
+logger = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 20
+BOOK_UPDATE_FIELDS = ['title', 'author', 'category', 'description', 'price', 'stock_quantity', 'updated_at']
+
+def read_rows(stream, fmt):
+    """Yield one dict per CSV line or JSON line of ``stream``, without loading the whole file."""
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+    elif fmt == 'jsonl':
+        for line in stream:
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # Counted as a skipped row by the importer
+                    yield None
+    else:
+        raise ValueError(f"Unknown import format: {fmt}")
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+@dataclass
+class ImportStats:
+    rows: int = 0
+    books: int = 0
+    skipped: int = 0
+    covers: int = 0
+    errors: list = field(default_factory=list)
+    started: float = field(default_factory=time.perf_counter)
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def rate(self):
+        return self.rows / self.elapsed if self.elapsed else 0
+
+class BookImporter:
+    """Load books in batches with a constant number of queries per batch.
+
+    Per batch: categories and authors missing from the in-memory lookup are
+    inserted with one ``bulk_create`` each, then books are upserted on ISBN
+    with a single ``bulk_create``. Covers for books that have none are
+    rendered in a process pool while the next batches are inserted.
+
+    Bulk inserts skip model signals, so ``finish()`` rebuilds the search
+    index, recounts books and categories and invalidates the catalog caches.
+    """
+
+    def __init__(self, batch_size=IMPORT_BATCH_SIZE, workers=None, covers=True, update=True, progress=None):
+        self.batch_size = batch_size
+        self.covers = covers
+        self.update = update
+        self.progress = progress
+        self.stats = ImportStats()
+        self.categories = dict(Category.objects.values_list('name', 'id'))
+        self.authors = {}
+        self._pool = ProcessPoolExecutor(max_workers=workers) if covers else None
+        self._pending = []
+        self._max_pending = (workers or 4) * 64
+
+    def run(self, rows):
+        try:
+            for batch in _batches(rows, self.batch_size):
+                self.import_batch(batch)
+                if self.progress:
+                    self.progress(self.stats)
+            self._save_covers(wait_all=True)
+        finally:
+            if self._pool:
+                self._pool.shutdown()
+            # Batches committed before a failure must still be searchable and counted
+            self.finish()
+        return self.stats
+
+    def _clean(self, row):
+        if not isinstance(row, dict):
+            raise ValueError("malformed line")
+        # JSON values may be numbers or null
+        text = {key: str(value if value is not None else '').strip() for key, value in row.items()}
+        title = text.get('title', '')
+        author = text.get('author', '')
+        category = text.get('category', '')
+        if not (title and author and category):
+            raise ValueError("title, author and category are required")
+        try:
+            price = Decimal(text.get('price') or '0').quantize(Decimal('0.01'))
+            stock = int(text.get('stock_quantity') or 0)
+        except (InvalidOperation, ValueError):
+            raise ValueError("invalid price or stock_quantity")
+        if price < 0 or stock < 0:
+            raise ValueError("price and stock_quantity must not be negative")
+        isbn = text.get('isbn', '').replace('-', '')
+        # The ISBN is the upsert key: a made-up or truncated one would create duplicates
+        if not isbn:
+            raise ValueError("isbn is required")
+        if len(isbn) > 13:
+            raise ValueError("isbn is longer than 13 characters")
+        return {
+            'title': title[:200],
+            'author': author[:200],
+            'category': category[:100],
+            'category_description': text.get('category_description', ''),
+            'isbn': isbn,
+            'description': text.get('description', ''),
+            'price': price,
+            'stock_quantity': stock,
+        }
+
+    def import_batch(self, rows):
+        cleaned = []
+        for row in rows:
+            self.stats.rows += 1
+            try:
+                cleaned.append(self._clean(row))
+            except ValueError as e:
+                self.stats.skipped += 1
+                if len(self.stats.errors) < MAX_REPORTED_ERRORS:
+                    self.stats.errors.append((self.stats.rows, str(e)))
+        if not cleaned:
+            return
+
+        with transaction.atomic():
+            self._resolve_categories(cleaned)
+            self._resolve_authors(cleaned)
+            # Last row wins when a batch repeats an ISBN
+            by_isbn = {row['isbn']: row for row in cleaned}
+            books = [
+                Book(
+                    title=row['title'], author_id=self.authors[row['author']],
+                    category_id=self.categories[row['category']], isbn=row['isbn'],
+                    description=row['description'], price=row['price'], stock_quantity=row['stock_quantity'],
+                )
+                for row in by_isbn.values()
+            ]
+            if self.update:
+                Book.objects.bulk_create(
+                    books, update_conflicts=True,
+                    unique_fields=['isbn'], update_fields=BOOK_UPDATE_FIELDS,
+                )
+                # The upsert can change prices without the post_save that refreshes cart totals
+                cart_ids = list(
+                    CartItem.objects.filter(book__isbn__in=by_isbn.keys()).values_list('cart_id', flat=True).distinct()
+                )
+                if cart_ids:
+                    transaction.on_commit(lambda: invalidate_cart_summary(*cart_ids))
+                written = len(books)
+            else:
+                # Conflicting rows are dropped silently, so count what the batch added
+                batch = Book.objects.filter(isbn__in=by_isbn.keys())
+                existing = batch.count()
+                Book.objects.bulk_create(books, ignore_conflicts=True)
+                written = batch.count() - existing
+        self.stats.books += written
+
+        if self.covers:
+            # Upserts do not return primary keys, so look the batch up again
+            missing = Book.objects.filter(
+                Q(cover_image='') | Q(cover_image__isnull=True), isbn__in=by_isbn.keys()
+            ).values_list('id', 'isbn')
+            for book_id, isbn in missing:
+                row = by_isbn[isbn]
+                future = self._pool.submit(create_book_cover, row['title'], row['author'], row['category'], isbn)
+                self._pending.append((book_id, future))
+            self._save_covers()
+
+    def _resolve_categories(self, rows):
+        missing = {}
+        for row in rows:
+            if row['category'] not in self.categories:
+                missing.setdefault(row['category'], row['category_description'])
+        if missing:
+            Category.objects.bulk_create(
+                [Category(name=name, description=description) for name, description in missing.items()],
+                ignore_conflicts=True,
+            )
+            self.categories.update(Category.objects.filter(name__in=missing).values_list('name', 'id'))
+
+    def _resolve_authors(self, rows):
+        names = {row['author'] for row in rows} - self.authors.keys()
+        if not names:
+            return
+        # Author names are not unique: reuse the oldest match
+        for name, pk in Author.objects.filter(name__in=names).order_by('-id').values_list('name', 'id'):
+            self.authors[name] = pk
+        missing = names - self.authors.keys()
+        if missing:
+            Author.objects.bulk_create([Author(name=name) for name in missing])
+            self.authors.update(Author.objects.filter(name__in=missing).values_list('name', 'id'))
+
+    def _save_covers(self, wait_all=False):
+        """Store the covers that are done; block on the oldest ones when too many are in flight."""
+        done, pending = [], []
+        for index, (book_id, future) in enumerate(self._pending):
+            must_wait = wait_all or len(self._pending) - index > self._max_pending
+            if future.done() or must_wait:
+                try:
+                    done.append(Book(pk=book_id, cover_image=future.result()))
+                except Exception:
+                    logger.exception("Cover rendering failed for book %s", book_id)
+            else:
+                pending.append((book_id, future))
+        self._pending = pending
+        if done:
+            now = timezone.now()
+            for book in done:
+                book.updated_at = now
+            Book.objects.bulk_update(done, ['cover_image', 'updated_at'], batch_size=self.batch_size)
+            self.stats.covers += len(done)
+
+    def finish(self):
+        rebuild_index()
+        reconcile(['books', 'categories'])
+        invalidate_catalog()
+
+def import_books(rows, **options):
+    return BookImporter(**options).run(rows)
@@ -0,0 +1,40 @@
+from datetime import datetime, time, timedelta
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from .models import Order, User
+
+ADMIN_PAGE_SIZE = 50
+
+ORDER_LIST_FIELDS = ('id', 'order_number', 'total_amount', 'status', 'created_at', 'user__username')
+USER_LIST_FIELDS = ('id', 'username', 'email', 'role', 'is_superuser', 'created_at')
+BOOK_LIST_FIELDS = ('id', 'title', 'price', 'stock_quantity', 'created_at', 'author__name', 'category__name')
+
+def _day_start(value):
+    day = parse_date(value or '')
+    if day is None:
+        return None
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+def filter_orders(queryset, params, prefix=''):
+    """Apply the ``status``, ``date_from`` and ``date_to`` (inclusive, YYYY-MM-DD) filters.
+
+    Dates become a half-open range on ``created_at`` so the index is used;
+    unknown statuses and malformed dates are ignored. ``prefix`` reaches the
+    order from a related model, e.g. ``'order__'`` for order items.
+    """
+    status = params.get('status')
+    if status in dict(Order.STATUS_CHOICES):
+        queryset = queryset.filter(**{f'{prefix}status': status})
+    start = _day_start(params.get('date_from'))
+    if start:
+        queryset = queryset.filter(**{f'{prefix}created_at__gte': start})
+    end = _day_start(params.get('date_to'))
+    if end:
+        queryset = queryset.filter(**{f'{prefix}created_at__lt': end + timedelta(days=1)})
+    return queryset
+
+def filter_users(queryset, params):
+    role = params.get('role')
+    if role in dict(User.ROLE_CHOICES):
+        queryset = queryset.filter(role=role)
+    return queryset
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+from core.dataset import DATASET_BATCH_SIZE, DATASET_PASSWORD, DatasetGenerator
+
+class Command(BaseCommand):
+    help = "Fill a scratch database with a seeded synthetic catalog, customers, carts and orders for load tests"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0, help="Same seed, same data")
+        parser.add_argument('--categories', type=int, default=12)
+        parser.add_argument('--authors', type=int, default=300)
+        parser.add_argument('--books', type=int, default=5000)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--order-items', type=int, default=50000, help="Order lines to create, e.g. 1000000")
+        parser.add_argument('--cart-ratio', type=float, default=0.2, help="Share of the users with a cart")
+        parser.add_argument('--days', type=int, default=365, help="Period covered by the orders")
+        parser.add_argument('--zipf', type=float, default=1.1, help="Exponent of the book popularity law")
+        parser.add_argument('--batch-size', type=int, default=DATASET_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        generator = DatasetGenerator(
+            seed=options['seed'],
+            categories=options['categories'],
+            authors=options['authors'],
+            books=options['books'],
+            users=options['users'],
+            order_items=options['order_items'],
+            cart_ratio=options['cart_ratio'],
+            days=options['days'],
+            zipf=options['zipf'],
+            batch_size=options['batch_size'],
+            progress=self.report,
+        )
+        try:
+            stats = generator.run()
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {stats.books} books, {stats.users} users, {stats.carts} carts ({stats.cart_items} items) "
+            f"and {stats.orders} orders ({stats.order_items} items) in {stats.elapsed:.1f}s ({stats.rate:.0f} rows/s). "
+            f"Users log in with the password {DATASET_PASSWORD!r}."
+        ))
+
+    def report(self, stats):
+        self.stdout.write(f"{stats.rows} rows, {stats.rate:.0f} rows/s", ending='\r')
+        self.stdout.flush()
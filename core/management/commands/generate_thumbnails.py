@@ -0,0 +1,43 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from core.catalog import invalidate_books
+from core.models import Book
+from core.thumbnails import generate_thumbnails, is_thumbnail
+
+class Command(BaseCommand):
+    help = "Generate the resized JPEG and WebP thumbnails of every cover in media/book_covers"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Worker processes")
+        parser.add_argument('--force', action='store_true', help="Regenerate thumbnails that are up to date")
+
+    def handle(self, *args, **options):
+        directory = os.path.join(settings.MEDIA_ROOT, 'book_covers')
+        names = sorted(
+            f'book_covers/{filename}' for filename in (os.listdir(directory) if os.path.isdir(directory) else [])
+            if filename.lower().endswith(('.jpg', '.jpeg', '.png')) and not is_thumbnail(filename)
+        )
+        start = time.perf_counter()
+        updated, written = [], 0
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            results = pool.map(generate_thumbnails, names, [None] * len(names), [options['force']] * len(names), chunksize=8)
+            for name, files in zip(names, results):
+                if files:
+                    updated.append(name)
+                    written += len(files)
+        elapsed = time.perf_counter() - start
+
+        # Cached book cards and pages were rendered without the new srcset
+        books = Book.objects.filter(cover_image__in=updated)
+        book_ids = list(books.values_list('pk', flat=True))
+        books.update(updated_at=timezone.now())
+        invalidate_books(*book_ids)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {written} thumbnails for {len(updated)} of {len(names)} covers in {elapsed:.1f}s "
+            f"({options['workers']} workers)."
+        ))
@@ -0,0 +1,51 @@
+import os
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from core.importer import IMPORT_BATCH_SIZE, BookImporter, read_rows
+
+class Command(BaseCommand):
+    help = "Import books from a CSV or JSON Lines file (title, author, category, isbn, description, price, stock_quantity)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, or - for standard input")
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help="Defaults to the file extension")
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Cover rendering processes")
+        parser.add_argument('--no-covers', action='store_true', help="Leave covers to a later run")
+        parser.add_argument('--skip-existing', action='store_true', help="Keep books whose ISBN already exists unchanged")
+
+    def handle(self, *args, **options):
+        path, fmt = options['path'], options['format']
+        if fmt is None:
+            if path.endswith('.csv'):
+                fmt = 'csv'
+            elif path.endswith(('.jsonl', '.ndjson')):
+                fmt = 'jsonl'
+            else:
+                raise CommandError("Cannot guess the format, use --format csv or --format jsonl")
+
+        importer = BookImporter(
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+            covers=not options['no_covers'],
+            update=not options['skip_existing'],
+            progress=self.report,
+        )
+        stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        try:
+            stats = importer.run(read_rows(stream, fmt))
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        self.stdout.write('')
+
+        for line, error in stats.errors:
+            self.stderr.write(f"Row {line}: {error}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {stats.books} books from {stats.rows} rows ({stats.skipped} skipped), "
+            f"{stats.covers} covers rendered in {stats.elapsed:.1f}s ({stats.rate:.0f} rows/s)."
+        ))
+
+    def report(self, stats):
+        self.stdout.write(f"{stats.rows} rows, {stats.rate:.0f} rows/s", ending='\r')
+        self.stdout.flush()
@@ -0,0 +1,24 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from core.analytics import rebuild_rollups
+
+class Command(BaseCommand):
+    help = "Recompute the daily sales rollups from the orders, e.g. after bulk loads or edits in the Django admin"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='start', help="First day to rebuild, YYYY-MM-DD (default: all)")
+        parser.add_argument('--to', dest='end', help="Last day to rebuild, included")
+
+    def handle(self, *args, **options):
+        days = {}
+        for key in ('start', 'end'):
+            if options[key]:
+                days[key] = parse_date(options[key])
+                if days[key] is None:
+                    raise CommandError(f"Invalid date: {options[key]}")
+        start = time.perf_counter()
+        written = rebuild_rollups(**days)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {written} rollup rows in {time.perf_counter() - start:.1f}s."
+        ))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from core.search import fts_available, rebuild_index
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index of the book catalog"
+
+    def handle(self, *args, **options):
+        if not fts_available():
+            self.stdout.write("Full-text search is only available on SQLite, nothing to do.")
+            return
+        count = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} books."))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+from core.counters import COUNTED_MODELS, reconcile
+
+class Command(BaseCommand):
+    help = "Recount users, books, orders and categories and fix the admin panel counters that drifted (run it from cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help=f"Counters to check among {', '.join(COUNTED_MODELS)} (default: all)")
+
+    def handle(self, *args, **options):
+        unknown = set(options['names']) - COUNTED_MODELS.keys()
+        if unknown:
+            raise CommandError(f"Unknown counter: {', '.join(sorted(unknown))}")
+        drift = reconcile(options['names'])
+        for name, (stored, actual) in drift.items():
+            self.stdout.write(f"{name}: {'missing' if stored is None else stored} -> {actual}")
+        self.stdout.write(self.style.SUCCESS(f"Fixed {len(drift)} counter(s)."))
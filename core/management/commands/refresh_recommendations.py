@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from core.recommendations import rebuild_recommendations, refresh_recommendations
+
+class Command(BaseCommand):
+    help = ("Update the \"customers also bought\" lists of the books in orders placed or changed since "
+            "the last run (run it from cron; --full nightly)")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help="Recompute every book from all the orders")
+
+    def handle(self, *args, **options):
+        stats = rebuild_recommendations() if options['full'] else refresh_recommendations()
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Rebuilt' if stats.full else 'Refreshed'} {stats.recommendations} recommendations "
+            f"for {stats.books} books in {stats.elapsed:.1f}s."
+        ))
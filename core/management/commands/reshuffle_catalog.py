@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from core.featured import reshuffle_catalog
+
+class Command(BaseCommand):
+    help = "Draw a new random order for the featured books and the catalog (run it from cron)"
+
+    def handle(self, *args, **options):
+        count = reshuffle_catalog()
+        self.stdout.write(self.style.SUCCESS(f"Reshuffled {count} books."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from core.payments import settle_pending_payments
+
+class Command(BaseCommand):
+    help = "Process again the payments of orders stuck in pending, e.g. after a restart (run it from cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int,
+                            help="Minimum age of the orders in seconds (default: PAYMENT_PENDING_TIMEOUT)")
+
+    def handle(self, *args, **options):
+        confirmed, cancelled = settle_pending_payments(options['older_than'])
+        self.stdout.write(self.style.SUCCESS(f"Settled {confirmed + cancelled} pending orders: "
+                                             f"{confirmed} confirmed, {cancelled} cancelled."))
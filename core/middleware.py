@@ -0,0 +1,126 @@
+import cProfile
+import itertools
+import json
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import Template as DjangoTemplate
+
+logger = logging.getLogger('core.performance')
+
+_current = ContextVar('request_metrics', default=None)
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self._template_depth = 0
+
+    def record_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+
+# Template rendering is timed by wrapping the template backend once; nested
+# renders (a template tag calling render_to_string) only count at the top level
+_original_render = DjangoTemplate.render
+_install_lock = threading.Lock()
+
+def _timed_render(self, context=None, request=None):
+    metrics = _current.get()
+    if metrics is None or metrics._template_depth:
+        return _original_render(self, context, request)
+    metrics._template_depth += 1
+    start = time.perf_counter()
+    try:
+        return _original_render(self, context, request)
+    finally:
+        metrics.template_time += time.perf_counter() - start
+        metrics._template_depth -= 1
+
+def _install_template_timer():
+    with _install_lock:
+        if DjangoTemplate.render is not _timed_render:
+            DjangoTemplate.render = _timed_render
+
+class RequestProfilingMiddleware:
+    """Measure every request and report it as Server-Timing and a JSON log line.
+
+    Records wall time, number and duration of DB queries and template render
+    time. With ``PROFILING_SAMPLE_RATE = N`` one request in N is also run
+    under cProfile and dumped to ``PROFILING_DIR``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'PROFILING_ENABLED', settings.DEBUG)
+        self.sample_rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0)
+        self.profile_dir = getattr(settings, 'PROFILING_DIR', None)
+        self._counter = itertools.count(1)
+        if self.enabled:
+            _install_template_timer()
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics.record_query))
+                response = self._get_response(request)
+        finally:
+            _current.reset(token)
+        total = time.perf_counter() - start
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.queries} queries"',
+            f'tpl;dur={metrics.template_time * 1000:.1f}',
+            f'app;dur={max(0.0, total - metrics.db_time - metrics.template_time) * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ])
+        match = getattr(request, 'resolver_match', None)
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 2),
+            'db_ms': round(metrics.db_time * 1000, 2),
+            'queries': metrics.queries,
+            'template_ms': round(metrics.template_time * 1000, 2),
+        }))
+        return response
+
+    def _get_response(self, request):
+        if not (self.sample_rate and self.profile_dir):
+            return self.get_response(request)
+        sequence = next(self._counter)
+        if sequence % self.sample_rate:
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        try:
+            response = profiler.runcall(self.get_response, request)
+        except ValueError:
+            # Another profiler is already active on this thread
+            return self.get_response(request)
+        os.makedirs(self.profile_dir, exist_ok=True)
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', request.path).strip('_') or 'root'
+        profiler.dump_stats(os.path.join(
+            self.profile_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{sequence}-{request.method}-{slug}.prof"
+        ))
+        return response
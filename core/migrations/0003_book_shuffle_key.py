@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:05
+
+import random
+
+import core.models
+from django.db import migrations, models
+
+
+def shuffle_existing_books(apps, schema_editor):
+    # AddField evaluates the default once, so existing rows all share one key
+    Book = apps.get_model("core", "Book")
+    books = list(Book.objects.only("id"))
+    for book in books:
+        book.shuffle_key = random.getrandbits(62)
+    Book.objects.bulk_update(books, ["shuffle_key"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0002_book_search_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="book",
+            name="shuffle_key",
+            field=models.BigIntegerField(
+                db_index=True, default=core.models.random_shuffle_key, editable=False
+            ),
+        ),
+        migrations.RunPython(shuffle_existing_books, migrations.RunPython.noop),
+    ]
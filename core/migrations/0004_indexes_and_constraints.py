@@ -0,0 +1,71 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:19
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+import django.db.models.deletion
+
+
+def merge_duplicate_carts(apps, schema_editor):
+    # The unique constraints below would fail on carts created by past races:
+    # keep each user's oldest cart and one line per book, summing quantities
+    Cart = apps.get_model("core", "Cart")
+    CartItem = apps.get_model("core", "CartItem")
+
+    duplicated = Cart.objects.values("user").annotate(n=Count("id")).filter(n__gt=1)
+    for row in duplicated:
+        carts = list(Cart.objects.filter(user=row["user"]).order_by("id").values_list("id", flat=True))
+        CartItem.objects.filter(cart_id__in=carts[1:]).update(cart_id=carts[0])
+        Cart.objects.filter(id__in=carts[1:]).delete()
+
+    duplicated = (
+        CartItem.objects.values("cart", "book")
+        .annotate(n=Count("id"), quantity=Sum("quantity"))
+        .filter(n__gt=1)
+    )
+    for row in duplicated:
+        items = list(
+            CartItem.objects.filter(cart=row["cart"], book=row["book"]).order_by("id").values_list("id", flat=True)
+        )
+        CartItem.objects.filter(id=items[0]).update(quantity=row["quantity"])
+        CartItem.objects.filter(id__in=items[1:]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0003_book_shuffle_key"),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_carts, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="cart",
+            name="user",
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name="author",
+            index=models.Index(fields=["name"], name="author_name_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="book",
+            index=models.Index(fields=["category", "shuffle_key"], name="book_category_shuffle_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="book",
+            index=models.Index(fields=["category", "-created_at"], name="book_category_recent_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="book",
+            index=models.Index(fields=["-created_at"], name="book_recent_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(fields=["user", "-created_at"], name="order_user_recent_idx"),
+        ),
+        migrations.AddConstraint(
+            model_name="cartitem",
+            constraint=models.UniqueConstraint(fields=("cart", "book"), name="unique_cart_book"),
+        ),
+    ]
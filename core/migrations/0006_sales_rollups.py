@@ -0,0 +1,54 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0005_admin_listing_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailySales",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("day", models.DateField(unique=True)),
+                ("orders", models.PositiveIntegerField(default=0)),
+                ("quantity", models.PositiveIntegerField(default=0)),
+                ("revenue", models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="DailyCategorySales",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("day", models.DateField()),
+                ("orders", models.PositiveIntegerField(default=0)),
+                ("quantity", models.PositiveIntegerField(default=0)),
+                ("revenue", models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ("category", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="core.category")),
+            ],
+        ),
+        migrations.CreateModel(
+            name="DailyBookSales",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("day", models.DateField()),
+                ("orders", models.PositiveIntegerField(default=0)),
+                ("quantity", models.PositiveIntegerField(default=0)),
+                ("revenue", models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ("book", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="core.book")),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="dailycategorysales",
+            constraint=models.UniqueConstraint(fields=("day", "category"), name="unique_daily_category_sales"),
+        ),
+        migrations.AddConstraint(
+            model_name="dailybooksales",
+            constraint=models.UniqueConstraint(fields=("day", "book"), name="unique_daily_book_sales"),
+        ),
+    ]
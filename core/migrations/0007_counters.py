@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:51
+
+from django.db import migrations, models
+
+
+def count_rows(apps, schema_editor):
+    Counter = apps.get_model("core", "Counter")
+    for name, model in (("users", "User"), ("books", "Book"), ("orders", "Order"), ("categories", "Category")):
+        Counter.objects.create(name=name, value=apps.get_model("core", model).objects.count())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0006_sales_rollups"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Counter",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("name", models.CharField(max_length=50, unique=True)),
+                ("value", models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(count_rows, migrations.RunPython.noop),
+    ]
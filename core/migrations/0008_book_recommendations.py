@@ -0,0 +1,50 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0007_counters"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BookRecommendation",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("rank", models.PositiveSmallIntegerField()),
+                ("orders", models.PositiveIntegerField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name="RecommendationRun",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("started_at", models.DateTimeField()),
+                ("full", models.BooleanField()),
+                ("books", models.PositiveIntegerField(default=0)),
+                ("recommendations", models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(fields=["updated_at"], name="order_updated_idx"),
+        ),
+        migrations.AddField(
+            model_name="bookrecommendation",
+            name="book",
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="recommendations", to="core.book"),
+        ),
+        migrations.AddField(
+            model_name="bookrecommendation",
+            name="recommended",
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="+", to="core.book"),
+        ),
+        migrations.AddConstraint(
+            model_name="bookrecommendation",
+            constraint=models.UniqueConstraint(fields=("book", "rank"), name="unique_book_recommendation_rank"),
+        ),
+    ]
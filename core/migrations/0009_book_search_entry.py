@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:20
+
+import core.search
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0008_book_recommendations"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BookSearchEntry",
+            fields=[
+                ("book", models.OneToOneField(db_column="rowid", db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name="search_entry", serialize=False, to="core.book")),
+                ("title", models.TextField()),
+                ("author", models.TextField()),
+                ("isbn", models.TextField()),
+                ("document", core.search.FullTextField(db_column="core_book_fts")),
+            ],
+            options={
+                "db_table": "core_book_fts",
+                "managed": False,
+            },
+        ),
+    ]
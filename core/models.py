@@ -1,6 +1,14 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MinValueValidator
+from django.templatetags.static import static
+from .search import FTS_TABLE, FullTextField
+import random
+import string
+
+def random_shuffle_key():
+    # 62 random bits: collisions are negligible even for millions of books
+    return random.getrandbits(62)
 
 class User(AbstractUser):
     ROLE_CHOICES = (
@@ -12,6 +20,12 @@ class User(AbstractUser):
     address = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Admin user list filtered by role, newest first
+            models.Index(fields=['role', 'id'], name='user_role_idx'),
+        ]
+
 class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
     description = models.TextField(blank=True)
@@ -25,6 +39,12 @@ class Author(models.Model):
     bio = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # get_or_create(name=...) when books are added or imported
+            models.Index(fields=['name'], name='author_name_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -37,14 +57,48 @@ class Book(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(0)])
     stock_quantity = models.IntegerField(validators=[MinValueValidator(0)])
     cover_image = models.ImageField(upload_to='book_covers/', blank=True, null=True)
+    # Position in the precomputed random order used by the home page and catalog
+    shuffle_key = models.BigIntegerField(default=random_shuffle_key, db_index=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Catalog by category, in shuffled order (keyset pagination) or newest first
+            models.Index(fields=['category', 'shuffle_key'], name='book_category_shuffle_idx'),
+            models.Index(fields=['category', '-created_at'], name='book_category_recent_idx'),
+            models.Index(fields=['-created_at'], name='book_recent_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
+    @property
+    def cover_url(self):
+        # Covers are rendered in the background, so a fresh book has none yet
+        if self.cover_image:
+            return self.cover_image.url
+        return static('covers/Blue.png')
+
+class BookSearchEntry(models.Model):
+    """Row of the FTS5 index, kept up to date by core.search.
+
+    Unmanaged: the table is created by a migration and only exists on SQLite.
+    It is mapped so that searches join it under the alias Django picks.
+    """
+    book = models.OneToOneField(Book, primary_key=True, db_column='rowid', db_constraint=False,
+                                on_delete=models.DO_NOTHING, related_name='search_entry')
+    title = models.TextField()
+    author = models.TextField()
+    isbn = models.TextField()
+    document = FullTextField(db_column=FTS_TABLE)
+
+    class Meta:
+        managed = False
+        db_table = FTS_TABLE
+
 class Cart(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    user = models.OneToOneField(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -54,6 +108,12 @@ class CartItem(models.Model):
     quantity = models.IntegerField(validators=[MinValueValidator(1)])
     added_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            # One line per book: concurrent add_to_cart calls fall back to updating it
+            models.UniqueConstraint(fields=['cart', 'book'], name='unique_cart_book'),
+        ]
+
 class Order(models.Model):
     STATUS_CHOICES = (
         ('pending', 'Pending'),
@@ -71,8 +131,88 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # My orders, newest first
+            models.Index(fields=['user', '-created_at'], name='order_user_recent_idx'),
+            # Admin order list: by status newest first, and by date range
+            models.Index(fields=['status', 'id'], name='order_status_idx'),
+            models.Index(fields=['created_at'], name='order_created_idx'),
+            # Orders placed or changed since the last recommendations refresh
+            models.Index(fields=['updated_at'], name='order_updated_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Numbered before the first insert, so creating an order is a single query
+        if not self.order_number:
+            self.order_number = generate_order_number()
+        super().save(*args, **kwargs)
+
+def generate_order_number():
+    random_str = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
+    return f"ORD-{random_str}"
+
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE)
     book = models.ForeignKey(Book, on_delete=models.CASCADE)
     quantity = models.IntegerField(validators=[MinValueValidator(1)])
-    price = models.DecimalField(max_digits=10, decimal_places=2)
\ No newline at end of file
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+
+# Sales rollups, maintained by core.analytics when an order is confirmed
+
+class DailySales(models.Model):
+    day = models.DateField(unique=True)
+    orders = models.PositiveIntegerField(default=0)
+    quantity = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+class DailyBookSales(models.Model):
+    day = models.DateField()
+    book = models.ForeignKey(Book, on_delete=models.CASCADE)
+    orders = models.PositiveIntegerField(default=0)
+    quantity = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            # Also the index of the dashboard's day range scans
+            models.UniqueConstraint(fields=['day', 'book'], name='unique_daily_book_sales'),
+        ]
+
+class DailyCategorySales(models.Model):
+    day = models.DateField()
+    category = models.ForeignKey(Category, on_delete=models.CASCADE)
+    orders = models.PositiveIntegerField(default=0)
+    quantity = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'category'], name='unique_daily_category_sales'),
+        ]
+
+class Counter(models.Model):
+    """Row count of a table, kept up to date by core.counters."""
+    name = models.CharField(max_length=50, unique=True)
+    value = models.BigIntegerField(default=0)
+
+# "Customers also bought", computed in batch by core.recommendations
+
+class BookRecommendation(models.Model):
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='recommendations')
+    recommended = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField()
+    # Number of orders with both books
+    orders = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            # Also the index book_detail reads the list with
+            models.UniqueConstraint(fields=['book', 'rank'], name='unique_book_recommendation_rank'),
+        ]
+
+class RecommendationRun(models.Model):
+    started_at = models.DateTimeField()
+    full = models.BooleanField()
+    books = models.PositiveIntegerField(default=0)
+    recommendations = models.PositiveIntegerField(default=0)
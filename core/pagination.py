@@ -0,0 +1,80 @@
+from django.core.paginator import Paginator
+
+CATALOG_PAGE_SIZE = 24
+
+class CatalogPage:
+    """One page of catalog results plus the querystrings of its neighbours."""
+
+    def __init__(self, items, params, next_params=None, previous_params=None):
+        self.items = items
+        self.next_query = self._querystring(params, next_params)
+        self.previous_query = self._querystring(params, previous_params)
+
+    @staticmethod
+    def _querystring(params, changes):
+        if changes is None:
+            return None
+        query = params.copy()
+        for key in ('after', 'before', 'page'):
+            query.pop(key, None)
+        query.update(changes)
+        return query.urlencode()
+
+    @property
+    def has_next(self):
+        return self.next_query is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_query is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+def _cursor(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def keyset_paginate(queryset, params, field='id', descending=True, per_page=CATALOG_PAGE_SIZE):
+    """Paginate ``queryset`` on a unique, indexed integer ``field``.
+
+    The cursor is the value of ``field`` on the last (``after``) or first
+    (``before``) row of the current page, so every page costs one indexed
+    range scan of ``per_page + 1`` rows no matter how deep it is.
+    """
+    after = _cursor(params.get('after'))
+    before = _cursor(params.get('before'))
+    forward, backward = (f'-{field}', field) if descending else (field, f'-{field}')
+    older, newer = (f'{field}__lt', f'{field}__gt') if descending else (f'{field}__gt', f'{field}__lt')
+
+    if before is not None:
+        rows = list(queryset.filter(**{newer: before}).order_by(backward)[:per_page + 1])
+        has_previous = len(rows) > per_page
+        items = rows[:per_page][::-1]
+        has_next = True
+    else:
+        if after is not None:
+            queryset = queryset.filter(**{older: after})
+        rows = list(queryset.order_by(forward)[:per_page + 1])
+        has_next = len(rows) > per_page
+        items = rows[:per_page]
+        has_previous = after is not None
+
+    next_params = previous_params = None
+    if items and has_next:
+        next_params = {'after': getattr(items[-1], field)}
+    if items and has_previous:
+        previous_params = {'before': getattr(items[0], field)}
+    return CatalogPage(items, params, next_params, previous_params)
+
+def offset_paginate(queryset, params, per_page=CATALOG_PAGE_SIZE):
+    """Page-number pagination for ranked results that have no stable keyset order."""
+    page = Paginator(queryset, per_page).get_page(params.get('page'))
+    next_params = {'page': page.next_page_number()} if page.has_next() else None
+    previous_params = {'page': page.previous_page_number()} if page.has_previous() else None
+    return CatalogPage(list(page), params, next_params, previous_params), page.paginator.count
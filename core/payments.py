@@ -0,0 +1,176 @@
+import asyncio
+import logging
+import random
+import threading
+from dataclasses import dataclass
+from datetime import timedelta
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from .models import Book, Cart, CartItem, Order
+from .cart import invalidate_cart_summary
+from .catalog import invalidate_books
+from .analytics import record_order
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class PaymentResult:
+    approved: bool
+    reference: str = ''
+    message: str = ''
+
+class PaymentGateway:
+    """Interface of a payment backend, selected with ``settings.PAYMENT_GATEWAY``.
+
+    ``authorize`` is a coroutine so a slow provider only parks a task on the
+    payment event loop, never a request worker.
+    """
+
+    async def authorize(self, order):
+        raise NotImplementedError
+
+class SimulatedGateway(PaymentGateway):
+    """Local stand-in for a card processor: fixed latency, random declines."""
+
+    def __init__(self, latency=None, approval_rate=None):
+        self.latency = getattr(settings, 'PAYMENT_SIMULATOR_LATENCY', 1.0) if latency is None else latency
+        self.approval_rate = getattr(settings, 'PAYMENT_SIMULATOR_APPROVAL_RATE', 0.95) if approval_rate is None else approval_rate
+
+    async def authorize(self, order):
+        await asyncio.sleep(self.latency)
+        if random.random() < self.approval_rate:
+            return PaymentResult(True, reference=f'SIM-{order.order_number}')
+        return PaymentResult(False, message='Payment declined.')
+
+def get_gateway():
+    return import_string(getattr(settings, 'PAYMENT_GATEWAY', 'core.payments.SimulatedGateway'))()
+
+# Order state transitions
+
+def confirm_order(order_id):
+    with transaction.atomic():
+        confirmed = Order.objects.filter(pk=order_id, status='pending').update(
+            status='confirmed', updated_at=timezone.now()
+        )
+        if confirmed:
+            record_order(Order.objects.only('created_at').get(pk=order_id))
+    return confirmed
+
+def cancel_order(order_id):
+    """Cancel a pending order, put its books back in stock and back in the cart."""
+    with transaction.atomic():
+        # Claim the order with a write first, which also takes the SQLite write lock
+        claimed = Order.objects.filter(pk=order_id, status='pending').update(
+            status='cancelled', updated_at=timezone.now()
+        )
+        if not claimed:
+            return False
+        order = Order.objects.get(pk=order_id)
+        items = list(order.orderitem_set.all())
+        for item in items:
+            Book.objects.filter(pk=item.book_id).update(
+                stock_quantity=F('stock_quantity') + item.quantity, updated_at=timezone.now()
+            )
+
+        cart, created = Cart.objects.get_or_create(user_id=order.user_id)
+        in_cart = set(cart.cartitem_set.filter(book_id__in=[item.book_id for item in items]).values_list('book_id', flat=True))
+        for item in items:
+            if item.book_id in in_cart:
+                cart.cartitem_set.filter(book_id=item.book_id).update(quantity=F('quantity') + item.quantity)
+        CartItem.objects.bulk_create([
+            CartItem(cart=cart, book_id=item.book_id, quantity=item.quantity)
+            for item in items if item.book_id not in in_cart
+        ])
+        # Bulk writes skip the Book and CartItem signals
+        transaction.on_commit(lambda: invalidate_books(*[item.book_id for item in items]))
+        transaction.on_commit(lambda: invalidate_cart_summary(cart.pk))
+    return True
+
+def _in_thread(func, *args, **kwargs):
+    # Payment callbacks run on worker threads that must not keep connections open
+    try:
+        return func(*args, **kwargs)
+    finally:
+        connection.close()
+
+def _settle(order_id, result):
+    if result.approved:
+        confirm_order(order_id)
+    else:
+        cancel_order(order_id)
+
+async def _authorize(gateway, order):
+    try:
+        return await gateway.authorize(order)
+    except Exception:
+        logger.exception("Payment gateway failed for order %s", order.order_number)
+        return PaymentResult(False, message='Payment gateway error.')
+
+async def process_payment(order_id, gateway=None):
+    gateway = gateway or get_gateway()
+    order = await sync_to_async(_in_thread, thread_sensitive=False)(Order.objects.get, pk=order_id)
+    result = await _authorize(gateway, order)
+    await sync_to_async(_in_thread, thread_sensitive=False)(_settle, order_id, result)
+    return result
+
+def run_payment(order_id, gateway=None):
+    """Process a payment synchronously in the calling thread (management commands, tests)."""
+    gateway = gateway or get_gateway()
+    order = Order.objects.get(pk=order_id)
+    result = async_to_sync(_authorize)(gateway, order)
+    _settle(order_id, result)
+    return result
+
+def settle_pending_payments(older_than=None, gateway=None):
+    """Run the payments of orders pending for more than ``older_than`` seconds again.
+
+    Background payments only live in the web process: a restart loses them
+    and leaves the order pending, its stock reserved and the cart empty.
+    This sweep, run from cron, settles them. The timeout must be well above
+    the gateway latency so payments still in flight are not authorized twice.
+    Returns the number of orders confirmed and cancelled.
+    """
+    if older_than is None:
+        older_than = getattr(settings, 'PAYMENT_PENDING_TIMEOUT', 15 * 60)
+    cutoff = timezone.now() - timedelta(seconds=older_than)
+    gateway = gateway or get_gateway()
+    confirmed = cancelled = 0
+    stale = Order.objects.filter(status='pending', created_at__lt=cutoff).order_by('id')
+    for order_id in stale.values_list('id', flat=True):
+        if run_payment(order_id, gateway).approved:
+            confirmed += 1
+        else:
+            cancelled += 1
+    return confirmed, cancelled
+
+# Background event loop shared by all in-flight payments of this process
+
+_loop = None
+_loop_lock = threading.Lock()
+
+def _get_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name='payments', daemon=True).start()
+        return _loop
+
+def _log_failure(future):
+    if not future.cancelled() and future.exception() is not None:
+        logger.error("Payment processing crashed", exc_info=future.exception())
+
+def submit_payment(order):
+    """Authorize ``order`` in the background once it is committed.
+
+    The order stays ``pending`` until the gateway answers; the client polls
+    ``order_status`` to follow it to ``confirmed`` (or ``cancelled``).
+    """
+    def start():
+        future = asyncio.run_coroutine_threadsafe(process_payment(order.pk), _get_loop())
+        future.add_done_callback(_log_failure)
+    transaction.on_commit(start)
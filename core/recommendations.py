@@ -0,0 +1,125 @@
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+from .analytics import SOLD_STATUSES
+from .models import BookRecommendation, Order, OrderItem, RecommendationRun
+
+RECOMMENDATIONS_PER_BOOK = 10
+REFRESH_BATCH_SIZE = 500
+# Orders committed while the previous run was reading are picked up by the next one
+REFRESH_OVERLAP = timedelta(minutes=5)
+LAST_REFRESH_KEY = 'recommendations:last_refresh'
+
+# Co-purchase counts are computed by the database in one set-based statement:
+# order lines are joined to the other lines of their order, pairs are counted
+# with GROUP BY and ranked per book with ROW_NUMBER(), and the top ones are
+# inserted directly. Nothing but the statement goes through Python, so memory
+# does not grow with the number of orders. A book's list only changes when an
+# order containing it does, which is what refresh() relies on.
+
+def _ranked_pairs_sql(book_ids=None):
+    qn = connection.ops.quote_name
+    item, order = qn(OrderItem._meta.db_table), qn(Order._meta.db_table)
+    params = list(SOLD_STATUSES)
+    only = ''
+    if book_ids:
+        only = f"AND a.book_id IN ({', '.join(['%s'] * len(book_ids))})"
+        params += book_ids
+    params.append(RECOMMENDATIONS_PER_BOOK)
+    sql = f'''
+        INSERT INTO {qn(BookRecommendation._meta.db_table)} (book_id, recommended_id, {qn('rank')}, orders)
+        SELECT book_id, other_id, position, together FROM (
+            SELECT book_id, other_id, together,
+                   ROW_NUMBER() OVER (PARTITION BY book_id ORDER BY together DESC, other_id) AS position
+            FROM (
+                SELECT a.book_id AS book_id, b.book_id AS other_id, COUNT(DISTINCT a.order_id) AS together
+                FROM {item} a
+                JOIN {order} o ON o.id = a.order_id
+                JOIN {item} b ON b.order_id = a.order_id AND b.book_id <> a.book_id
+                WHERE o.status IN ({', '.join(['%s'] * len(SOLD_STATUSES))}) {only}
+                GROUP BY a.book_id, b.book_id
+            ) pairs
+        ) ranked
+        WHERE position <= %s
+    '''
+    return sql, params
+
+@dataclass
+class RefreshStats:
+    full: bool = False
+    books: int = 0
+    recommendations: int = 0
+    started: float = field(default_factory=time.perf_counter)
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+def _finish(run, stats):
+    run.books, run.recommendations = stats.books, stats.recommendations
+    run.save()
+    # Book pages put the refresh time in their ETag and Last-Modified
+    transaction.on_commit(lambda: cache.set(LAST_REFRESH_KEY, run.started_at.isoformat(), None))
+
+def rebuild_recommendations():
+    """Recompute the recommendations of every book from all the sold orders."""
+    stats = RefreshStats(full=True)
+    run = RecommendationRun(started_at=timezone.now(), full=True)
+    with transaction.atomic():
+        BookRecommendation.objects.all().delete()
+        with connection.cursor() as cursor:
+            cursor.execute(*_ranked_pairs_sql())
+            stats.recommendations = cursor.rowcount
+        stats.books = BookRecommendation.objects.filter(rank=1).count()
+        _finish(run, stats)
+    return stats
+
+def refresh_recommendations(batch_size=REFRESH_BATCH_SIZE):
+    """Recompute the recommendations of the books in orders placed or changed since the last run.
+
+    Falls back to a full rebuild the first time. Deleted orders are not
+    seen: a periodic full rebuild takes them out.
+    """
+    last = RecommendationRun.objects.order_by('-started_at').first()
+    if last is None:
+        return rebuild_recommendations()
+
+    stats = RefreshStats()
+    run = RecommendationRun(started_at=timezone.now(), full=False)
+    # A subquery rather than a join, so SQLite starts from the updated_at index
+    changed = Order.objects.filter(updated_at__gte=last.started_at - REFRESH_OVERLAP)
+    book_ids = sorted(OrderItem.objects.filter(order__in=changed).values_list('book_id', flat=True).distinct())
+    with transaction.atomic():
+        for start in range(0, len(book_ids), batch_size):
+            batch = book_ids[start:start + batch_size]
+            BookRecommendation.objects.filter(book_id__in=batch).delete()
+            with connection.cursor() as cursor:
+                cursor.execute(*_ranked_pairs_sql(batch))
+                stats.recommendations += cursor.rowcount
+        stats.books = len(book_ids)
+        _finish(run, stats)
+    return stats
+
+def last_refresh():
+    """When the recommendations last changed (ISO string), '' before the first run."""
+    def latest():
+        run = RecommendationRun.objects.order_by('-started_at').first()
+        return run.started_at.isoformat() if run else ''
+    return cache.get_or_set(LAST_REFRESH_KEY, latest, None)
+
+def get_recommendations(book_id):
+    """The books bought with ``book_id``, best first, with their author: one query on the (book, rank) index."""
+    return list(
+        BookRecommendation.objects.filter(book_id=book_id)
+        .select_related('recommended__author')
+        .order_by('rank')
+    )
+
+def request_recommendations(request, book_id):
+    # Read once per request: the ETag, Last-Modified and the page all use the list
+    if getattr(request, '_recommendations', None) is None:
+        request._recommendations = get_recommendations(book_id)
+    return request._recommendations
@@ -0,0 +1,96 @@
+import os
+import time
+from dataclasses import dataclass, field
+from django.conf import settings
+from django.db import connection, transaction
+from .cart import invalidate_cart_summary
+from .catalog import invalidate_catalog
+from .counters import reconcile
+from .models import (
+    Author, Book, BookRecommendation, CartItem, Category, DailyBookSales, DailyCategorySales, OrderItem,
+)
+from .search import FTS_TABLE, fts_available
+from .thumbnails import source_stem
+
+RESET_BATCH_SIZE = 10000
+
+# Children first, so no foreign key is ever left dangling. Deleting the books
+# also deletes their cart and order lines, their sales rollups and their
+# recommendations, as the ORM cascade did; orders and the per-day totals are kept.
+CATALOG_MODELS = [
+    CartItem, OrderItem, DailyBookSales, DailyCategorySales, BookRecommendation, Book, Author, Category,
+]
+
+@dataclass
+class ResetStats:
+    deleted: dict = field(default_factory=dict)
+    covers: int = 0
+    cover_bytes: int = 0
+    timings: dict = field(default_factory=dict)
+    started: float = field(default_factory=time.perf_counter)
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+def _delete_all(cursor, model, batch_size):
+    """Delete every row of ``model`` with raw DELETEs of ``batch_size`` rows; returns the count."""
+    table = connection.ops.quote_name(model._meta.db_table)
+    pk = connection.ops.quote_name(model._meta.pk.column)
+    total = 0
+    while True:
+        cursor.execute(f'DELETE FROM {table} WHERE {pk} IN (SELECT {pk} FROM {table} LIMIT %s)', [batch_size])
+        total += cursor.rowcount
+        if cursor.rowcount < batch_size:
+            return total
+
+def clear_catalog(batch_size=RESET_BATCH_SIZE, remove_covers=False):
+    """Delete every book, author and category without loading them.
+
+    ``Book.objects.all().delete()`` fetches every book and every cart and
+    order line pointing at it to run the cascade in Python. Here each table
+    is emptied with batched DELETEs in dependency order, in one transaction.
+    Signals do not fire, so the search index, catalog caches, admin
+    counters and the summaries of the affected carts are reset explicitly.
+    """
+    stats = ResetStats()
+    with transaction.atomic():
+        cart_ids = list(CartItem.objects.values_list('cart_id', flat=True).distinct())
+        with connection.cursor() as cursor:
+            for model in CATALOG_MODELS:
+                step = time.perf_counter()
+                stats.deleted[model._meta.label] = _delete_all(cursor, model, batch_size)
+                stats.timings[model._meta.label] = time.perf_counter() - step
+            if fts_available():
+                cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        reconcile(['books', 'categories'])
+        transaction.on_commit(invalidate_catalog)
+        transaction.on_commit(lambda: invalidate_cart_summary(*cart_ids))
+
+    if remove_covers:
+        step = time.perf_counter()
+        stats.covers, stats.cover_bytes = remove_orphan_covers()
+        stats.timings['cover files'] = time.perf_counter() - step
+    return stats
+
+def remove_orphan_covers():
+    """Delete the covers and thumbnails in media/book_covers that no book uses.
+
+    Returns the number of files and bytes removed.
+    """
+    directory = os.path.join(settings.MEDIA_ROOT, 'book_covers')
+    if not os.path.isdir(directory):
+        return 0, 0
+    used = {
+        source_stem(name)
+        for name in Book.objects.exclude(cover_image='').exclude(cover_image__isnull=True)
+        .values_list('cover_image', flat=True).iterator()
+    }
+    removed = size = 0
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_file() and source_stem(f'book_covers/{entry.name}') not in used:
+                size += entry.stat().st_size
+                os.unlink(entry.path)
+                removed += 1
+    return removed, size
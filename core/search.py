@@ -0,0 +1,127 @@
+import re
+from django.db import connection, models
+from django.db.models import F, Q
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'core_book_fts'
+
+# Column weights for bm25(): a hit in the title counts more than one in the author or ISBN
+RANK_WEIGHTS = (10.0, 5.0, 1.0)
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+_ISBN_RE = re.compile(r'^\d[\d-]+[\dXx]$')
+
+class FullTextField(models.TextField):
+    """FTS5's hidden column named after the table, the left side of MATCH."""
+
+@FullTextField.register_lookup
+class Match(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', [*lhs_params, *rhs_params]
+
+class Rank(models.Func):
+    """bm25() of the matched row; lower is more relevant."""
+    function = 'bm25'
+    output_field = models.FloatField()
+
+    def __init__(self, document, weights=RANK_WEIGHTS):
+        super().__init__(document, *(models.Value(weight) for weight in weights))
+
+def fts_available():
+    return connection.vendor == 'sqlite'
+
+def build_match_expression(query):
+    """Turn free text into an FTS5 MATCH expression with prefix matching.
+
+    Every word must match (implicit AND) and each word is a prefix, so
+    "harr pot" finds "Harry Potter". Words are quoted so FTS5 operators in
+    user input are taken literally.
+    """
+    query = query.strip()
+    if _ISBN_RE.match(query):
+        query = query.replace('-', '')
+    tokens = _TOKEN_RE.findall(query)
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+def legacy_filter(queryset, query):
+    return queryset.filter(
+        Q(title__icontains=query) |
+        Q(author__name__icontains=query) |
+        Q(isbn__icontains=query)
+    )
+
+def search_books(queryset, query):
+    """Filter a Book queryset by ``query`` and order it by relevance.
+
+    Backed by the ``core_book_fts`` FTS5 table on SQLite, with the old
+    ``icontains`` filter as a fallback on other database backends.
+    """
+    if not fts_available():
+        return legacy_filter(queryset, query)
+
+    expression = build_match_expression(query)
+    if not expression:
+        return queryset.none()
+
+    query = query.strip()
+    if _ISBN_RE.match(query):
+        # FTS only matches ISBN prefixes, so digits from the middle of one go
+        # through a substring match. Ranking numbers makes little sense, and
+        # joining the index would turn the OR into a scan of every book.
+        matches = RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [expression])
+        return queryset.filter(
+            Q(pk__in=matches) | Q(isbn__contains=query.replace('-', ''))
+        ).order_by('isbn')
+
+    return queryset.filter(search_entry__document__match=expression).annotate(
+        search_rank=Rank(F('search_entry__document'))
+    ).order_by('search_rank')
+
+# Index maintenance
+
+def index_book(book):
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [book.pk])
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, author, isbn) '
+            f'SELECT b.id, b.title, a.name, b.isbn FROM core_book b '
+            f'JOIN core_author a ON a.id = b.author_id WHERE b.id = %s',
+            [book.pk]
+        )
+
+def unindex_book(book_id):
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [book_id])
+
+def reindex_author(author):
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'UPDATE {FTS_TABLE} SET author = %s '
+            f'WHERE rowid IN (SELECT id FROM core_book WHERE author_id = %s)',
+            [author.name, author.pk]
+        )
+
+def rebuild_index():
+    """Rebuild the whole index, e.g. after bulk inserts that skip signals."""
+    if not fts_available():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, author, isbn) '
+            f'SELECT b.id, b.title, a.name, b.isbn FROM core_book b '
+            f'JOIN core_author a ON a.id = b.author_id'
+        )
+        cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+        cursor.execute(f'SELECT count(*) FROM {FTS_TABLE}')
+        return cursor.fetchone()[0]
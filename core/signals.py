@@ -1,13 +1,77 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from django.utils.text import slugify
-from . models import Order, User
-import random
-import string
-
-@receiver(post_save, sender=Order)
-def generate_order_number(sender, instance, created, **kwargs):
-    if created and not instance.order_number:
-        random_str = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
-        instance.order_number = f"ORD-{random_str}"
-        instance.save()
\ No newline at end of file
+from django.utils import timezone
+from . models import Book, Author, Category, Cart, CartItem
+from . import catalog, counters, search
+from . cart import invalidate_cart_summary, forget_cart_id
+
+# Keep the full-text search index in sync with the catalog
+@receiver(post_save, sender=Book)
+def index_book(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_book(instance)
+
+@receiver(post_delete, sender=Book)
+def unindex_book(sender, instance, **kwargs):
+    search.unindex_book(instance.pk)
+
+@receiver(post_save, sender=Author)
+def reindex_author(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        search.reindex_author(instance)
+
+# Catalog read cache
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+def invalidate_cached_book(sender, instance, **kwargs):
+    catalog.invalidate_books(instance.pk)
+
+@receiver(post_save, sender=Author)
+def invalidate_author_books(sender, instance, created, raw=False, **kwargs):
+    # Deleting an author cascades to its books, which invalidate themselves
+    if created or raw:
+        return
+    books = Book.objects.filter(author=instance)
+    # Book cards are cached per updated_at and show the author name
+    books.update(updated_at=timezone.now())
+    catalog.invalidate_books(*books.values_list('pk', flat=True))
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_categories(sender, instance, **kwargs):
+    catalog.invalidate_categories()
+
+
+# Cart summary cache (header badge and cart total)
+@receiver(post_save, sender=CartItem)
+@receiver(post_delete, sender=CartItem)
+def invalidate_cart_item(sender, instance, **kwargs):
+    invalidate_cart_summary(instance.cart_id)
+
+@receiver(post_save, sender=Cart)
+@receiver(post_delete, sender=Cart)
+def invalidate_cart(sender, instance, **kwargs):
+    forget_cart_id(instance.user_id)
+    invalidate_cart_summary(instance.pk)
+
+@receiver(post_save, sender=Book)
+def invalidate_carts_with_book(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    # Cart totals depend on the book price
+    if created or raw or (update_fields is not None and 'price' not in update_fields):
+        return
+    cart_ids = CartItem.objects.filter(book=instance).values_list('cart_id', flat=True)
+    invalidate_cart_summary(*cart_ids)
+
+# Admin panel counters
+def _counter_receivers(name, model):
+    @receiver(post_save, sender=model, weak=False, dispatch_uid=f'count_{name}_save')
+    def count_created(sender, instance, created, **kwargs):
+        if created:
+            counters.adjust(name, 1)
+
+    @receiver(post_delete, sender=model, weak=False, dispatch_uid=f'count_{name}_delete')
+    def count_deleted(sender, instance, **kwargs):
+        counters.adjust(name, -1)
+
+for name, model in counters.COUNTED_MODELS.items():
+    _counter_receivers(name, model)
@@ -0,0 +1,61 @@
+import atexit
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from django.conf import settings
+from django.db import connection, transaction
+from .utils import create_book_cover
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=getattr(settings, 'COVER_RENDER_WORKERS', 2))
+        atexit.register(_executor.shutdown, wait=False)
+    return _executor
+
+def save_cover(book_id, cover_path):
+    from .models import Book
+    book = Book.objects.filter(pk=book_id).first()
+    if book is None:
+        return
+    book.cover_image = cover_path
+    book.save(update_fields=['cover_image', 'updated_at'])
+
+def _on_cover_rendered(book_id, future):
+    # Runs on the executor's callback thread, which owns its own DB connection
+    global _executor
+    try:
+        save_cover(book_id, future.result())
+    except BrokenProcessPool:
+        logger.exception("Cover worker pool died while rendering book %s", book_id)
+        _executor = None
+    except Exception:
+        logger.exception("Cover rendering failed for book %s", book_id)
+    finally:
+        connection.close()
+
+def _submit(book_id, args):
+    future = get_executor().submit(create_book_cover, *args)
+    future.add_done_callback(lambda f: _on_cover_rendered(book_id, f))
+    return future
+
+def enqueue_cover_render(book):
+    """Render the cover of ``book`` in the worker pool once the book is committed.
+
+    Until the job finishes ``book.cover_image`` stays empty and templates show
+    the placeholder. With ``COVER_RENDER_ASYNC = False`` the cover is rendered
+    inline instead.
+    """
+    args = (book.title, book.author.name, book.category.name, book.isbn)
+    if not getattr(settings, 'COVER_RENDER_ASYNC', True):
+        try:
+            book.cover_image = create_book_cover(*args)
+            book.save(update_fields=['cover_image', 'updated_at'])
+        except Exception:
+            logger.exception("Cover rendering failed for book %s", book.pk)
+        return
+    transaction.on_commit(lambda: _submit(book.pk, args))
@@ -1,17 +1,13 @@
+import hashlib
 from django import template
 from django.utils.html import format_html
-from django.templatetags.static import static
+from ..thumbnails import has_thumbnails, srcset
 
 register = template.Library()
 
 @register.simple_tag
 def book_cover_with_text(book):
     """Génère une div avec l'image de couverture et le texte superposé"""
-    if book.cover_image:
-        cover_url = book.cover_image.url
-    else:
-        cover_url = static('covers/Blue.png')
-    
     return format_html(
         '''<div style="position: relative; display: inline-block; width: 100%; height: 300px;">
             <img src="{}" alt="{}" style="width: 100%; height: 100%; object-fit: cover; border-radius: 8px;">
@@ -22,8 +18,42 @@ def book_cover_with_text(book):
                 <div style="font-size: 0.9rem; padding: 0 10px;">{}</div>
             </div>
         </div>''',
-        cover_url,
+        book.cover_url,
         book.title,
         book.title,
         book.author.name
-    )
\ No newline at end of file
+    )
+
+@register.simple_tag
+def cover_srcset(book, ext='webp'):
+    """``srcset`` of the cover thumbnails of ``book`` in the given format."""
+    if not book.cover_image:
+        return ''
+    return srcset(book.cover_image.name, ext)
+
+@register.inclusion_tag('core/includes/cover_picture.html')
+def cover_picture(book, sizes, css_class='', style='', loading='lazy'):
+    """<picture> with WebP and JPEG thumbnails, or a plain <img> until they exist.
+
+    A book whose cover is still being rendered gets the placeholder cover.
+    """
+    name = book.cover_image.name
+    thumbnails = bool(name) and has_thumbnails(name)
+    return {
+        'book': book,
+        'sizes': sizes,
+        'css_class': css_class,
+        'style': style,
+        'loading': loading,
+        'thumbnails': thumbnails,
+        'webp_srcset': srcset(name, 'webp') if thumbnails else '',
+        'jpg_srcset': srcset(name, 'jpg') if thumbnails else '',
+    }
+
+@register.filter
+def book_versions(books):
+    """Digest of the ids and versions of ``books``, to cache a whole grid of cards."""
+    digest = hashlib.md5(usedforsecurity=False)
+    for book in books:
+        digest.update(f'{book.pk}:{book.updated_at.isoformat()};'.encode())
+    return digest.hexdigest()
@@ -1,9 +1,65 @@
-from django.test import TestCase
+import io
+import json
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+from collections import Counter
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+from PIL import Image
 from django.contrib.auth import get_user_model
-from .models import Category, Author, Book
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, connections, IntegrityError
+from django.db.models import Count, F, Sum
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from .analytics import sales_dashboard
+from .cart import get_cart_summary
+from .catalog import get_book, get_categories, in_stock_count, cache_stats
+from .checkout import place_order, InsufficientStockError
+from .counters import get_counts
+from .exports import order_item_rows
+from .featured import featured_books, reshuffle_catalog
+from .forms import BookForm
+from .importer import import_books
+from .models import (
+    Category, Author, Book, Cart, CartItem, Order, OrderItem,
+    DailyBookSales, DailyCategorySales, DailySales, BookRecommendation, RecommendationRun,
+)
+from .pagination import CATALOG_PAGE_SIZE
+from .payments import SimulatedGateway, run_payment, confirm_order
+from .recommendations import get_recommendations, rebuild_recommendations, refresh_recommendations
+from .reset import remove_orphan_covers, clear_catalog
+from .search import search_books
+from .thumbnails import THUMBNAIL_WIDTHS, thumbnail_name
+from .utils import COVER_SIZE, noise_background, _noise_offsets, create_book_cover, render_book_cover
 
 User = get_user_model()
 
+def setUpModule():
+    # Keep the per-request performance lines out of the test output
+    logger = logging.getLogger('core')
+    unittest.addModuleCleanup(logger.setLevel, logger.level)
+    logger.setLevel(logging.WARNING)
+
+class TempMediaMixin:
+    """Points MEDIA_ROOT at a fresh temporary directory for each test."""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = self.settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
 class BookModelTest(TestCase):
     def setUp(self):
         self.category = Category.objects.create(name="Fiction")
@@ -32,4 +88,1071 @@ class UserModelTest(TestCase):
 
     def test_user_creation(self):
         self.assertEqual(self.user.username, 'testuser')
-        self.assertTrue(self.user.check_password('testpass123'))
\ No newline at end of file
+        self.assertTrue(self.user.check_password('testpass123'))
+
+class BookCoverTest(TestCase):
+    def test_noise_background_stays_within_amplitude(self):
+        img = noise_background((70, 130, 180))
+        self.assertEqual(img.size, COVER_SIZE)
+        (r_min, r_max), (g_min, g_max), (b_min, b_max) = img.getextrema()
+        self.assertGreaterEqual(r_min, 55)
+        self.assertLessEqual(r_max, 85)
+        self.assertGreaterEqual(b_min, 165)
+        self.assertLessEqual(b_max, 195)
+
+    def test_noise_offsets_are_uniform(self):
+        with mock.patch('core.utils.random.randbytes', side_effect=lambda n: bytes(i % 256 for i in range(n))):
+            offsets = _noise_offsets(248)
+        self.assertEqual(Counter(offsets), {offset: 8 for offset in range(31)})
+
+
+class CoverRenderQueueTest(TempMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.form_data = {
+            'title': 'Queued Book',
+            'isbn': '9781234567897',
+            'description': 'Test description',
+            'price': '12.50',
+            'stock_quantity': 3,
+            'author_name': 'Jane Roe',
+            'selected_category': 'Literature',
+        }
+
+    def test_cover_render_deferred_until_commit(self):
+        form = BookForm(self.form_data)
+        self.assertTrue(form.is_valid())
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            book = form.save()
+        self.assertEqual(len(callbacks), 1)
+        book.refresh_from_db()
+        self.assertFalse(book.cover_image)
+        self.assertEqual(book.cover_url, '/static/covers/Blue.png')
+
+    def test_pending_cover_shows_placeholder(self):
+        cache.clear()
+        form = BookForm(self.form_data)
+        self.assertTrue(form.is_valid())
+        with self.captureOnCommitCallbacks(execute=False):
+            form.save()
+        response = self.client.get('/books/')
+        self.assertContains(response, 'src="/static/covers/Blue.png"')
+        self.assertNotContains(response, 'no-cover')
+        response = self.client.get('/live-search/', {'q': 'Queued'})
+        self.assertEqual(response.json()['books'][0]['cover_image'], '/static/covers/Blue.png')
+
+    def test_inline_render_when_async_disabled(self):
+        with override_settings(COVER_RENDER_ASYNC=False):
+            form = BookForm(self.form_data)
+            self.assertTrue(form.is_valid())
+            book = form.save()
+        book.refresh_from_db()
+        self.assertEqual(book.cover_image.name, 'book_covers/9781234567897_Literature.jpg')
+
+
+class BookSearchTest(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="Fiction")
+        self.rowling = Author.objects.create(name="Joanne Rowling")
+        self.potter = Book.objects.create(
+            title="Harry Potter", author=self.rowling, category=self.category,
+            isbn="9780747532699", description="Wizards", price=10, stock_quantity=5
+        )
+        self.pottery = Book.objects.create(
+            title="Pottery Basics", author=Author.objects.create(name="Ann Clay"),
+            category=self.category, isbn="9781111111111", description="Clay", price=8,
+            stock_quantity=5
+        )
+
+    def search(self, query):
+        return list(search_books(Book.objects.all(), query))
+
+    def test_prefix_and_multi_word_match(self):
+        self.assertEqual(self.search("harr pot"), [self.potter])
+        self.assertCountEqual(self.search("pot"), [self.potter, self.pottery])
+
+    def test_author_and_isbn_match(self):
+        self.assertEqual(self.search("rowl"), [self.potter])
+        self.assertEqual(self.search("978-0747"), [self.potter])
+        # Digits from the middle of an ISBN are matched as a substring
+        self.assertEqual(self.search("0747532"), [self.potter])
+
+    def test_index_follows_book_and_author_changes(self):
+        self.potter.title = "Philosopher's Stone"
+        self.potter.save()
+        self.assertEqual(self.search("philosopher"), [self.potter])
+        self.assertEqual(self.search("harry"), [])
+
+        self.rowling.name = "Robert Galbraith"
+        self.rowling.save()
+        self.assertEqual(self.search("galbraith"), [self.potter])
+
+        self.potter.delete()
+        self.assertEqual(self.search("galbraith"), [])
+
+    def test_operators_in_query_are_literal(self):
+        self.assertEqual(self.search('pot" OR *'), [])
+        self.assertEqual(self.search("!!!"), [])
+
+    def test_live_search_endpoint(self):
+        response = self.client.get('/live-search/', {'q': 'harry'})
+        self.assertEqual([b['title'] for b in response.json()['books']], ["Harry Potter"])
+
+
+class CatalogPaginationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name="Fiction")
+        author = Author.objects.create(name="John Doe")
+        self.books = Book.objects.bulk_create(
+            Book(title=f"Book {i}", author=author, category=category, isbn=f"97800000000{i:02d}",
+                 description="", price=10, stock_quantity=1)
+            for i in range(30)
+        )
+
+    def test_keyset_pages_cover_catalog_once(self):
+        response = self.client.get('/books/')
+        first = response.context['books']
+        self.assertEqual(len(first), CATALOG_PAGE_SIZE)
+        self.assertEqual(response.context['total_count'], 30)
+        self.assertFalse(first.has_previous)
+
+        response = self.client.get(f'/books/?{first.next_query}')
+        second = response.context['books']
+        self.assertFalse(second.has_next)
+        seen = [b.shuffle_key for b in first] + [b.shuffle_key for b in second]
+        self.assertEqual(sorted(seen), seen)
+        self.assertEqual(len(set(seen)), 30)
+
+        response = self.client.get(f'/books/?{second.previous_query}')
+        self.assertEqual([b.id for b in response.context['books']], [b.id for b in first])
+
+    def test_cursor_keeps_filters_in_querystring(self):
+        category_id = self.books[0].category_id
+        response = self.client.get('/books/', {'category': category_id})
+        self.assertIn(f'category={category_id}', response.context['books'].next_query)
+
+    def test_catalog_page_query_count(self):
+        self.client.get('/books/')
+        # Count and categories are cached: one page of books with their authors
+        with self.assertNumQueries(1):
+            self.client.get('/books/')
+
+
+class FeaturedBooksTest(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name="Fiction")
+        author = Author.objects.create(name="John Doe")
+        Book.objects.bulk_create(
+            Book(title=f"Book {i}", author=author, category=category, isbn=f"97800000000{i:02d}",
+                 description="", price=10, stock_quantity=i % 2)
+            for i in range(20)
+        )
+
+    def test_featured_books_are_in_stock_and_distinct(self):
+        for _ in range(20):
+            books = featured_books(Book.objects.filter(stock_quantity__gt=0), count=8)
+            self.assertEqual(len(books), 8)
+            self.assertEqual(len({b.id for b in books}), 8)
+            self.assertTrue(all(b.stock_quantity > 0 for b in books))
+
+    def test_featured_books_with_small_catalog(self):
+        books = featured_books(Book.objects.filter(stock_quantity__gt=0), count=50)
+        self.assertEqual(len(books), 10)
+
+    def test_reshuffle_catalog(self):
+        before = dict(Book.objects.values_list('id', 'shuffle_key'))
+        self.assertEqual(reshuffle_catalog(batch_size=7), 20)
+        after = dict(Book.objects.values_list('id', 'shuffle_key'))
+        self.assertNotEqual(before, after)
+
+    def test_home_query_count(self):
+        # Categories plus one book query, and a second one when the random start wraps around
+        for start, expected in ((0, 2), (2 ** 62, 3)):
+            cache.clear()
+            with mock.patch('core.featured.random_shuffle_key', return_value=start):
+                with self.assertNumQueries(expected):
+                    response = self.client.get('/')
+            self.assertEqual(len(response.context['books']), 8)
+
+
+class CheckoutServiceTest(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="Fiction")
+        self.author = Author.objects.create(name="John Doe")
+        self.user = User.objects.create_user(username='buyer', password='pass12345', address='1 Main St')
+        self.cart = Cart.objects.create(user=self.user)
+
+    def fill_cart(self, cart, n_books, stock=5, quantity=1):
+        books = Book.objects.bulk_create(
+            Book(title=f"Book {i}", author=self.author, category=self.category,
+                 isbn=f"9{cart.pk:04d}{i:08d}", description="", price=10, stock_quantity=stock)
+            for i in range(n_books)
+        )
+        CartItem.objects.bulk_create(CartItem(cart=cart, book=book, quantity=quantity) for book in books)
+        return books
+
+    def test_place_order(self):
+        books = self.fill_cart(self.cart, 3, quantity=2)
+        order = place_order(self.user)
+        self.assertTrue(order.order_number.startswith('ORD-'))
+        self.assertEqual(order.status, 'confirmed')
+        self.assertEqual(order.shipping_address, '1 Main St')
+        self.assertEqual(order.total_amount, 60)
+        self.assertEqual(order.orderitem_set.count(), 3)
+        self.assertFalse(CartItem.objects.filter(cart=self.cart).exists())
+        self.assertEqual(Book.objects.get(pk=books[0].pk).stock_quantity, 3)
+
+    def test_query_count_does_not_depend_on_cart_size(self):
+        counts = []
+        for n_books in (1, 50):
+            user = User.objects.create_user(username=f'buyer{n_books}', password='pass12345')
+            self.fill_cart(Cart.objects.create(user=user), n_books)
+            with CaptureQueriesContext(connection) as queries:
+                place_order(user)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_oversell_rolls_back_everything(self):
+        books = self.fill_cart(self.cart, 2, stock=1)
+        Book.objects.filter(pk=books[1].pk).update(stock_quantity=0)
+        with self.assertRaises(InsufficientStockError) as raised:
+            place_order(self.user)
+        self.assertEqual(raised.exception.book.pk, books[1].pk)
+        self.assertEqual(Book.objects.get(pk=books[0].pk).stock_quantity, 1)
+        self.assertEqual(CartItem.objects.filter(cart=self.cart).count(), 2)
+        self.assertFalse(self.user.order_set.exists())
+
+    def test_last_copy_goes_to_one_buyer(self):
+        book = self.fill_cart(self.cart, 1, stock=1)[0]
+        rival = User.objects.create_user(username='rival', password='pass12345')
+        CartItem.objects.create(cart=Cart.objects.create(user=rival), book=book, quantity=1)
+
+        place_order(rival)
+        with self.assertRaises(InsufficientStockError):
+            place_order(self.user)
+        self.assertEqual(Book.objects.get(pk=book.pk).stock_quantity, 0)
+
+
+class PaymentFlowTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='payer', password='pass12345')
+        self.book = Book.objects.create(
+            title="Paid Book", author=Author.objects.create(name="John Doe"),
+            category=Category.objects.create(name="Fiction"), isbn="9780000000099",
+            description="", price=15, stock_quantity=3
+        )
+        CartItem.objects.create(cart=Cart.objects.create(user=self.user), book=self.book, quantity=2)
+        self.client.force_login(self.user)
+
+    def checkout(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            response = self.client.post('/checkout/')
+        # One payment scheduled; the other callbacks invalidate caches
+        self.assertEqual(len([c for c in callbacks if c.__module__ == 'core.payments']), 1)
+        order = Order.objects.get(user=self.user)
+        self.assertRedirects(response, f'/orders/{order.order_number}/', fetch_redirect_response=False)
+        return order
+
+    def test_checkout_returns_pending_order_without_waiting(self):
+        order = self.checkout()
+        self.assertEqual(order.status, 'pending')
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.stock_quantity, 1)
+        response = self.client.get(f'/orders/{order.order_number}/', HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.json()['status'], 'pending')
+
+    def test_approved_payment_confirms_order(self):
+        order = self.checkout()
+        run_payment(order.pk, SimulatedGateway(latency=0, approval_rate=1))
+        order.refresh_from_db()
+        self.assertEqual(order.status, 'confirmed')
+        response = self.client.get(f'/orders/{order.order_number}/')
+        self.assertTemplateUsed(response, 'core/payment_success.html')
+
+    def test_declined_payment_restores_stock_and_cart(self):
+        order = self.checkout()
+        run_payment(order.pk, SimulatedGateway(latency=0, approval_rate=0))
+        order.refresh_from_db()
+        self.assertEqual(order.status, 'cancelled')
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.stock_quantity, 3)
+        self.assertEqual(CartItem.objects.get(cart__user=self.user).quantity, 2)
+
+    def test_lost_payments_are_settled(self):
+        order = self.checkout()
+        out = io.StringIO()
+        with self.settings(PAYMENT_SIMULATOR_LATENCY=0, PAYMENT_SIMULATOR_APPROVAL_RATE=1):
+            call_command('settle_pending_payments', stdout=out)
+            self.assertIn("Settled 0 pending orders", out.getvalue())
+            # The payment job died with its process
+            Order.objects.filter(pk=order.pk).update(created_at=timezone.now() - timedelta(hours=1))
+            call_command('settle_pending_payments', stdout=out)
+        self.assertIn("Settled 1 pending orders: 1 confirmed, 0 cancelled.", out.getvalue())
+        order.refresh_from_db()
+        self.assertEqual(order.status, 'confirmed')
+
+
+class CartSummaryCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='shopper', password='pass12345')
+        category = Category.objects.create(name="Fiction")
+        author = Author.objects.create(name="John Doe")
+        self.books = [
+            Book.objects.create(title=f"Book {i}", author=author, category=category,
+                                isbn=f"978000000010{i}", description="", price=10 + i, stock_quantity=5)
+            for i in range(2)
+        ]
+        self.client.force_login(self.user)
+
+    def test_summary_follows_cart_changes(self):
+        self.assertEqual(get_cart_summary(self.user)['count'], 0)
+
+        self.client.get(f'/cart/add/{self.books[0].id}/')
+        self.client.get(f'/cart/add/{self.books[0].id}/')
+        self.client.get(f'/cart/add/{self.books[1].id}/')
+        summary = get_cart_summary(self.user)
+        self.assertEqual(summary['count'], 2)
+        self.assertEqual(summary['total'], 10 * 2 + 11)
+
+        self.books[1].price = 20
+        self.books[1].save()
+        self.assertEqual(get_cart_summary(self.user)['total'], 10 * 2 + 20)
+
+        item = CartItem.objects.get(book=self.books[0])
+        response = self.client.get(f'/cart/remove/{item.id}/', HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.json()['cart_count'], 1)
+
+    def test_badge_rendered_server_side_from_cache(self):
+        self.client.get(f'/cart/add/{self.books[0].id}/')
+        response = self.client.get('/')
+        self.assertContains(response, '<span id="cart-count">1</span>', html=False)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/')
+        self.assertFalse([q for q in queries if 'core_cartitem' in q['sql']])
+
+
+class CartQueryCountTest(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name="Fiction")
+        author = Author.objects.create(name="John Doe")
+        self.books = Book.objects.bulk_create(
+            Book(title=f"Book {i}", author=author, category=category, isbn=f"9780000{i:06d}",
+                 description="", price="12.50", stock_quantity=5)
+            for i in range(100)
+        )
+
+    def user_with_cart(self, n_items):
+        user = User.objects.create_user(username=f'cart{n_items}', password='pass12345')
+        cart = Cart.objects.create(user=user)
+        CartItem.objects.bulk_create(CartItem(cart=cart, book=book, quantity=2) for book in self.books[:n_items])
+        return user
+
+    def count_queries(self, user, url):
+        cache.clear()
+        self.client.force_login(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def test_cart_and_checkout_query_count_is_constant(self):
+        small, large = self.user_with_cart(1), self.user_with_cart(100)
+        for url in ('/cart/', '/checkout/', '/my-orders/'):
+            small_count, response = self.count_queries(small, url)
+            large_count, response = self.count_queries(large, url)
+            self.assertEqual(small_count, large_count, url)
+
+    def test_cart_total_computed_in_database(self):
+        count, response = self.count_queries(self.user_with_cart(100), '/cart/')
+        self.assertEqual(response.context['total'], 2500)
+        self.assertEqual(response.context['cart_items'][0].line_total, 25)
+
+@override_settings(PROFILING_ENABLED=True)
+class RequestProfilingTest(TestCase):
+    def setUp(self):
+        Category.objects.create(name="Fiction")
+
+    def test_server_timing_header(self):
+        with self.assertLogs('core.performance', level='INFO') as logs:
+            response = self.client.get('/books/')
+        timing = dict(part.strip().split(';', 1)[0:2] for part in response['Server-Timing'].split(','))
+        self.assertEqual(set(timing), {'db', 'tpl', 'app', 'total'})
+        line = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(line['path'], '/books/')
+        self.assertEqual(line['view'], 'book_list')
+        self.assertGreater(line['queries'], 0)
+        self.assertGreater(line['template_ms'], 0)
+
+    def test_sampled_requests_are_profiled(self):
+        with tempfile.TemporaryDirectory() as profile_dir:
+            with self.settings(PROFILING_SAMPLE_RATE=2, PROFILING_DIR=profile_dir):
+                for _ in range(4):
+                    self.client.get('/books/')
+            self.assertEqual(len(os.listdir(profile_dir)), 2)
+
+    def test_disabled(self):
+        with self.settings(PROFILING_ENABLED=False):
+            response = self.client.get('/books/')
+        self.assertFalse(response.has_header('Server-Timing'))
+
+class DatabaseProfileTest(TestCase):
+    def test_pragmas_applied_to_new_connections(self):
+        default = connections['default']
+        with tempfile.TemporaryDirectory() as directory:
+            other = default.__class__({**default.settings_dict, 'NAME': os.path.join(directory, 'db.sqlite3')})
+            try:
+                with other.cursor() as cursor:
+                    cursor.execute('PRAGMA journal_mode')
+                    self.assertEqual(cursor.fetchone()[0], 'wal')
+                    cursor.execute('PRAGMA synchronous')
+                    self.assertEqual(cursor.fetchone()[0], 1)
+                    cursor.execute('PRAGMA busy_timeout')
+                    self.assertEqual(cursor.fetchone()[0], 5000)
+            finally:
+                other.close()
+
+class QueryPlanTest(TestCase):
+    """The hot queries must be served by an index, never a full scan or a sort."""
+
+    def setUp(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('EXPLAIN QUERY PLAN output is SQLite specific')
+        self.user = User.objects.create_user(username='planner', password='pass12345')
+
+    def assertUsesIndex(self, queryset, index=None):
+        plan = queryset.explain()
+        self.assertRegex(plan, r'USING (COVERING |INTEGER PRIMARY KEY|PRIMARY KEY|)(INDEX|KEY)', plan)
+        self.assertNotIn('USE TEMP B-TREE', plan, plan)
+        if index:
+            self.assertIn(index, plan)
+
+    def test_catalog_by_category(self):
+        books = Book.objects.filter(stock_quantity__gt=0, category_id=1)
+        self.assertUsesIndex(books.order_by('shuffle_key')[:25], 'book_category_shuffle_idx')
+        self.assertUsesIndex(books.order_by('-created_at')[:25], 'book_category_recent_idx')
+
+    def test_admin_books_newest_first(self):
+        self.assertUsesIndex(Book.objects.order_by('-created_at')[:20], 'book_recent_idx')
+
+    def test_cart_lookups(self):
+        self.assertUsesIndex(Cart.objects.filter(user=self.user))
+        self.assertUsesIndex(CartItem.objects.filter(cart_id=1, book_id=1))
+
+    def test_orders_of_user(self):
+        self.assertUsesIndex(Order.objects.filter(user=self.user).order_by('-created_at'), 'order_user_recent_idx')
+
+    def test_admin_listings(self):
+        self.assertUsesIndex(Order.objects.filter(status='pending').order_by('-id')[:50], 'order_status_idx')
+        self.assertUsesIndex(Order.objects.filter(created_at__gte=timezone.now()), 'order_created_idx')
+        self.assertUsesIndex(User.objects.filter(role='admin').order_by('-id')[:50], 'user_role_idx')
+
+    def test_author_by_name(self):
+        self.assertUsesIndex(Author.objects.filter(name='John Doe'), 'author_name_idx')
+
+class CartConstraintTest(TestCase):
+    def test_one_line_per_book(self):
+        user = User.objects.create_user(username='dup', password='pass12345')
+        book = Book.objects.create(
+            title="Book", author=Author.objects.create(name="A"), category=Category.objects.create(name="C"),
+            isbn="9781234567890", description="", price="10.00", stock_quantity=5,
+        )
+        cart = Cart.objects.create(user=user)
+        CartItem.objects.create(cart=cart, book=book, quantity=1)
+        with self.assertRaises(IntegrityError):
+            CartItem.objects.create(cart=cart, book=book, quantity=1)
+
+class CatalogCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name="Fiction")
+        self.author = Author.objects.create(name="John Doe")
+        self.book = Book.objects.create(
+            title="Cached Book", author=self.author, category=self.category, isbn="9781234567890",
+            description="", price="10.00", stock_quantity=2,
+        )
+
+    def test_book_detail_cached_until_book_changes(self):
+        get_book(self.book.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_book(self.book.pk).author.name, "John Doe")
+        self.book.title = "Renamed"
+        self.book.save()
+        self.assertEqual(get_book(self.book.pk).title, "Renamed")
+
+    def test_author_and_category_changes_invalidate(self):
+        get_book(self.book.pk), get_categories()
+        self.author.name = "Jane Doe"
+        self.author.save()
+        self.assertEqual(get_book(self.book.pk).author.name, "Jane Doe")
+        self.category.name = "Thriller"
+        self.category.save()
+        self.assertEqual(get_book(self.book.pk).category.name, "Thriller")
+        self.assertEqual([c.name for c in get_categories()], ["Thriller"])
+
+    def test_checkout_invalidates_stock_counts(self):
+        user = User.objects.create_user(username='buyer', password='pass12345')
+        CartItem.objects.create(cart=Cart.objects.create(user=user), book=self.book, quantity=2)
+        self.assertEqual(in_stock_count(self.category.pk), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            place_order(user)
+        self.assertEqual(in_stock_count(self.category.pk), 0)
+        self.assertEqual(in_stock_count(), 0)
+        self.assertEqual(get_book(self.book.pk).stock_quantity, 0)
+
+    def test_hit_rate_on_admin_panel(self):
+        self.client.get(f'/books/{self.book.pk}/')
+        self.client.get(f'/books/{self.book.pk}/')
+        stats = cache_stats()
+        self.assertEqual(stats['misses'], 1)
+        self.assertGreater(stats['hits'], 0)
+        admin = User.objects.create_superuser(username='admin', password='pass12345')
+        self.client.force_login(admin)
+        self.assertContains(self.client.get('/admin-panel/'), f"{stats['hits']} hits / 1 misses")
+
+class BookCardCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = Author.objects.create(name="John Doe")
+        self.book = Book.objects.create(
+            title="Card Book", author=self.author, category=Category.objects.create(name="Fiction"),
+            isbn="9781234567890", description="", price="10.00", stock_quantity=2,
+        )
+
+    def test_card_refreshed_when_book_or_author_changes(self):
+        self.assertContains(self.client.get('/books/'), "Card Book")
+        self.book.title = "Renamed Book"
+        self.book.save()
+        self.assertContains(self.client.get('/books/'), "Renamed Book")
+        self.author.name = "Jane Doe"
+        self.author.save()
+        self.assertContains(self.client.get('/books/'), "Jane Doe")
+
+    def test_card_depends_on_login(self):
+        self.assertNotContains(self.client.get('/books/'), "addToCart({})".format(self.book.pk))
+        self.client.force_login(User.objects.create_user(username='reader', password='pass12345'))
+        self.assertContains(self.client.get('/books/'), "addToCart({}, this)".format(self.book.pk))
+
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.book = Book.objects.create(
+            title="Etag Book", author=Author.objects.create(name="John Doe"),
+            category=Category.objects.create(name="Fiction"), isbn="9781234567890",
+            description="", price="10.00", stock_quantity=2,
+        )
+
+    def revalidate(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_unchanged_pages_return_304(self):
+        for url in ('/books/', f'/books/{self.book.pk}/', '/live-search/?q=etag'):
+            self.assertEqual(self.revalidate(url).status_code, 304, url)
+
+    def test_book_change_invalidates_etag(self):
+        etag = self.client.get(f'/books/{self.book.pk}/')['ETag']
+        catalog_etag = self.client.get('/books/')['ETag']
+        self.book.price = "12.00"
+        self.book.save()
+        self.assertEqual(self.client.get(f'/books/{self.book.pk}/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        self.assertEqual(self.client.get('/books/', HTTP_IF_NONE_MATCH=catalog_etag).status_code, 200)
+
+    def test_etag_depends_on_viewer(self):
+        etag = self.client.get('/books/')['ETag']
+        self.client.force_login(User.objects.create_user(username='reader', password='pass12345'))
+        self.assertEqual(self.client.get('/books/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_cache_control_and_compression(self):
+        response = self.client.get('/books/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertIn('max-age=60', self.client.get('/live-search/?q=etag')['Cache-Control'])
+
+class ThumbnailTest(TempMediaMixin, TestCase):
+    def test_cover_creation_writes_every_size(self):
+        name = create_book_cover("Title", "Author", "Fiction", "9781234567890")
+        for width in THUMBNAIL_WIDTHS:
+            for ext in ('jpg', 'webp'):
+                with Image.open(os.path.join(self.media_root, thumbnail_name(name, width, ext))) as image:
+                    self.assertEqual(image.size, (width, width * 3 // 2))
+
+    def test_backfill_command_and_picture_tag(self):
+        os.makedirs(os.path.join(self.media_root, 'book_covers'))
+        render_book_cover("Old", "Author", "Fiction", "9781234567890").save(
+            os.path.join(self.media_root, 'book_covers', 'old.jpg'), 'JPEG'
+        )
+        book = Book(pk=1, title="Old", cover_image='book_covers/old.jpg')
+        template = Template('{% load book_extras %}{% cover_picture book sizes="200px" %}')
+        self.assertNotIn('<picture>', template.render(Context({'book': book})))
+
+        call_command('generate_thumbnails', workers=1, stdout=open(os.devnull, 'w'))
+        self.assertEqual(len(os.listdir(os.path.join(self.media_root, 'book_covers'))), 7)
+        html = template.render(Context({'book': book}))
+        self.assertIn('<source type="image/webp" srcset="/media/book_covers/old.100w.webp 100w', html)
+        self.assertIn('/media/book_covers/old.300w.jpg 300w"', html)
+
+class ImportBooksTest(TempMediaMixin, TestCase):
+    def write(self, name, content):
+        path = os.path.join(self.media_root, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def call(self, *args):
+        out = io.StringIO()
+        call_command('import_books', *args, stdout=out, stderr=io.StringIO())
+        return out.getvalue()
+
+    def test_csv_import_is_an_upsert(self):
+        path = self.write('books.csv', (
+            "title,author,category,isbn,description,price,stock_quantity\n"
+            "Dune,Frank Herbert,Science Fiction,978-0441013593,Spice,9.99,4\n"
+            "Children of Dune,Frank Herbert,Science Fiction,9780441104024,,8.50,2\n"
+            ",Nobody,Nowhere,123,,1,1\n"
+        ))
+        output = self.call(path, '--no-covers', '--batch-size', '2')
+        self.assertIn("Imported 2 books from 3 rows (1 skipped)", output)
+        self.assertEqual(Author.objects.filter(name="Frank Herbert").count(), 1)
+        self.assertEqual(Book.objects.get(isbn="9780441013593").category.name, "Science Fiction")
+        self.assertEqual(search_books(Book.objects.all(), "dune").count(), 2)
+
+        path = self.write('update.jsonl', '{"title": "Dune", "author": "Frank Herbert", "category": "Classics", '
+                                          '"isbn": "9780441013593", "price": "12.00", "stock_quantity": 1}\n')
+        self.call(path, '--no-covers')
+        book = Book.objects.get(isbn="9780441013593")
+        self.assertEqual((book.price, book.category.name), (12, "Classics"))
+        self.assertEqual(Book.objects.count(), 2)
+
+    def test_bad_lines_are_skipped(self):
+        path = self.write('books.jsonl', (
+            '{"title": 1984, "author": "George Orwell", "category": "Fiction", "isbn": 9780451524935, '
+            '"price": 7.5, "stock_quantity": 3, "description": null}\n'
+            '{"title": "Broken\n'
+            '[1, 2]\n'
+        ))
+        self.assertIn("Imported 1 books from 3 rows (2 skipped)", self.call(path, '--no-covers'))
+        book = Book.objects.get(isbn="9780451524935")
+        self.assertEqual((book.title, str(book.price), book.description), ("1984", "7.50", ""))
+        self.assertEqual(get_counts()['books'], 1)
+
+    def test_missing_or_long_isbn_is_skipped(self):
+        path = self.write('books.csv', (
+            "title,author,category,isbn,price,stock_quantity\n"
+            "Dune,Frank Herbert,Fiction,,9.99,4\n"
+            "Dune,Frank Herbert,Fiction,97804410135930,9.99,4\n"
+            "Emma,Jane Austen,Classics,978-0141439587,5,-1\n"
+        ))
+        err = io.StringIO()
+        call_command('import_books', path, '--no-covers', stdout=io.StringIO(), stderr=err)
+        self.assertEqual(err.getvalue().splitlines(), [
+            "Row 1: isbn is required",
+            "Row 2: isbn is longer than 13 characters",
+            "Row 3: price and stock_quantity must not be negative",
+        ])
+        self.assertFalse(Book.objects.exists())
+
+    def test_skip_existing_counts_new_books_only(self):
+        path = self.write('books.csv', (
+            "title,author,category,isbn,price,stock_quantity\n"
+            "Dune,Frank Herbert,Fiction,9780441013593,9.99,4\n"
+        ))
+        self.call(path, '--no-covers')
+        path = self.write('more.csv', (
+            "title,author,category,isbn,price,stock_quantity\n"
+            "Dune,Frank Herbert,Fiction,9780441013593,20,4\n"
+            "Children of Dune,Frank Herbert,Fiction,9780441104024,8.50,2\n"
+        ))
+        self.assertIn("Imported 1 books from 2 rows (0 skipped)", self.call(path, '--no-covers', '--skip-existing'))
+        self.assertEqual(Book.objects.get(isbn="9780441013593").price, Decimal('9.99'))
+
+    def test_failed_import_keeps_committed_batches_consistent(self):
+
+        def rows():
+            yield {'title': "Dune", 'author': "Frank Herbert", 'category': "Fiction", 'isbn': "9780441013593"}
+            raise OSError("connection reset")
+
+        with self.assertRaises(OSError):
+            import_books(rows(), batch_size=1, covers=False)
+        self.assertEqual(search_books(Book.objects.all(), "dune").count(), 1)
+        self.assertEqual(get_counts()['books'], 1)
+
+    def test_price_update_refreshes_cart_totals(self):
+        user = User.objects.create_user(username='reader', password='pass12345')
+        book = Book.objects.create(title="Dune", author=Author.objects.create(name="Frank Herbert"),
+                                   category=Category.objects.create(name="Fiction"), isbn="9780441013593",
+                                   description="", price=10, stock_quantity=5)
+        CartItem.objects.create(cart=Cart.objects.create(user=user), book=book, quantity=2)
+        self.assertEqual(get_cart_summary(user)['total'], 20)
+        path = self.write('prices.csv', (
+            "title,author,category,isbn,price,stock_quantity\n"
+            "Dune,Frank Herbert,Fiction,9780441013593,50,5\n"
+        ))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.call(path, '--no-covers')
+        self.assertEqual(get_cart_summary(user)['total'], 100)
+
+    def test_covers_rendered_in_pool(self):
+        path = self.write('books.csv', (
+            "title,author,category,isbn,price,stock_quantity\n"
+            "Dune,Frank Herbert,Fiction,9780441013593,9.99,4\n"
+        ))
+        self.assertIn("1 covers rendered", self.call(path, '--workers', '1'))
+        cover = Book.objects.get().cover_image.name
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, cover)))
+
+class GenerateDatasetTest(TestCase):
+    def generate(self, seed=7):
+        out = io.StringIO()
+        call_command('generate_dataset', '--seed', str(seed), '--categories', '3', '--authors', '5', '--books', '40',
+                     '--users', '10', '--order-items', '300', '--batch-size', '50', stdout=out)
+        return out.getvalue()
+
+    def test_generates_requested_volume(self):
+        self.assertIn("(300 items)", self.generate())
+        self.assertEqual(OrderItem.objects.count(), 300)
+        self.assertEqual(Book.objects.filter(isbn__startswith='7007').count(), 40)
+        # Totals match the lines and bestsellers dominate
+        order = Order.objects.annotate(lines=Sum(F('orderitem__price') * F('orderitem__quantity'))).first()
+        self.assertEqual(order.total_amount, order.lines)
+        sales = list(OrderItem.objects.values('book').annotate(n=Count('id')).order_by('-n').values_list('n', flat=True))
+        self.assertGreater(sales[0], 5 * sales[len(sales) // 2])
+
+    def test_same_seed_same_data(self):
+        self.generate()
+        first = list(OrderItem.objects.order_by('id').values_list('book__isbn', 'quantity', 'order__user__username'))
+        with self.assertRaises(CommandError):
+            self.generate()
+        User.objects.filter(username__startswith='load007-').delete()
+        Book.objects.filter(isbn__startswith='7007').delete()
+        self.generate()
+        second = list(OrderItem.objects.order_by('id').values_list('book__isbn', 'quantity', 'order__user__username'))
+        self.assertEqual(first, second)
+
+class ClearCatalogTest(TempMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        os.makedirs(os.path.join(self.media_root, 'book_covers'))
+        for name in ('kept.jpg', 'kept.200w.webp', 'orphan.jpg', 'orphan.100w.jpg'):
+            open(os.path.join(self.media_root, 'book_covers', name), 'wb').close()
+
+        self.user = User.objects.create_user(username='shopper', password='pass12345')
+        category = Category.objects.create(name="Fiction")
+        author = Author.objects.create(name="John Doe")
+        self.book = Book.objects.create(title="Kept", author=author, category=category, isbn="9780000000501",
+                                        description="", price=10, stock_quantity=5, cover_image='book_covers/kept.jpg')
+
+    def covers(self):
+        return sorted(os.listdir(os.path.join(self.media_root, 'book_covers')))
+
+    def test_orphan_covers_only(self):
+        self.assertEqual(remove_orphan_covers(), (2, 0))
+        self.assertEqual(self.covers(), ['kept.200w.webp', 'kept.jpg'])
+
+    def test_clear_catalog(self):
+        cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=cart, book=self.book, quantity=1)
+        place_order(self.user)
+        CartItem.objects.create(cart=cart, book=self.book, quantity=2)
+        self.assertEqual(get_cart_summary(self.user)['count'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            stats = clear_catalog(batch_size=1, remove_covers=True)
+        self.assertEqual(stats.deleted['core.Book'], 1)
+        self.assertEqual(stats.covers, 4)
+        self.assertEqual(self.covers(), [])
+        for model in (Book, Author, Category, CartItem, OrderItem):
+            self.assertFalse(model.objects.exists())
+        # Orders are kept, like with the ORM cascade, and caches are reset
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertFalse(search_books(Book.objects.all(), "kept").exists())
+        self.assertEqual(get_cart_summary(self.user)['count'], 0)
+
+class AdminListingTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='boss', password='pass12345', role='admin')
+        customers = [User.objects.create_user(username=f'reader{i}', password='pass12345') for i in range(3)]
+        for i in range(60):
+            Order.objects.create(user=customers[i % 3], total_amount=10, shipping_address='Nairobi',
+                                 status='shipped' if i % 2 else 'pending')
+        self.client.force_login(self.admin)
+
+    def test_orders_are_paginated_without_n_plus_one(self):
+        with self.assertNumQueries(3):
+            response = self.client.get('/admin-panel/orders/')
+        page = response.context['orders']
+        self.assertEqual(len(page), 50)
+        self.assertTrue(page.has_next)
+        response = self.client.get(f'/admin-panel/orders/?{page.next_query}')
+        self.assertEqual(len(response.context['orders']), 10)
+
+    def test_order_filters(self):
+        response = self.client.get('/admin-panel/orders/?status=pending')
+        self.assertEqual([order.status for order in response.context['orders']], ['pending'] * 30)
+
+        Order.objects.filter(pk__in=Order.objects.order_by('id').values('pk')[:5]).update(
+            created_at=timezone.now() - timedelta(days=30))
+        day = (timezone.now() - timedelta(days=30)).date().isoformat()
+        response = self.client.get(f'/admin-panel/orders/?date_from={day}&date_to={day}')
+        self.assertEqual(len(response.context['orders']), 5)
+
+    def test_csv_export_streams_every_row(self):
+        response = self.client.get('/admin-panel/orders/?format=csv&status=shipped')
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'id,order_number,customer,total_amount,status,created_at')
+        self.assertEqual(len(lines), 31)
+
+    def test_books_are_paginated_without_n_plus_one(self):
+        category, author = Category.objects.create(name="Fiction"), Author.objects.create(name="John Doe")
+        Book.objects.bulk_create(
+            Book(title=f"River {i}", author=author, category=category, isbn=f"97800000004{i:02d}",
+                 description="", price=10, stock_quantity=1)
+            for i in range(60)
+        )
+        cache.clear()
+        # Session, user, cart id of the header badge, and one page of books with their authors and categories
+        with self.assertNumQueries(4):
+            response = self.client.get('/admin-panel/books/')
+        self.assertContains(response, "John Doe")
+        page = response.context['books']
+        self.assertEqual(len(page), 50)
+        response = self.client.get(f'/admin-panel/books/?{page.next_query}')
+        self.assertEqual(len(response.context['books']), 10)
+
+    def test_users_filtered_by_role(self):
+        response = self.client.get('/admin-panel/users/?role=admin')
+        self.assertEqual([user.username for user in response.context['users']], ['boss'])
+        response = self.client.get('/admin-panel/users/?format=csv')
+        self.assertEqual(len(b''.join(response.streaming_content).splitlines()), 5)
+
+class OrderItemExportTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='boss', password='pass12345', role='admin')
+        customer = User.objects.create_user(username='reader', password='pass12345')
+        book = Book.objects.create(title="Dune, Part One", author=Author.objects.create(name="Frank Herbert"),
+                                   category=Category.objects.create(name="Fiction"), isbn="9780441013593",
+                                   description="", price="9.99", stock_quantity=5)
+        for status in ('pending', 'confirmed', 'confirmed'):
+            order = Order.objects.create(user=customer, total_amount="19.98", shipping_address="Nairobi", status=status)
+            OrderItem.objects.create(order=order, book=book, quantity=2, price="9.99")
+            OrderItem.objects.create(order=order, book=book, quantity=1, price="9.99")
+
+    def test_rows_in_chunks(self):
+        rows = list(order_item_rows({'status': 'confirmed'}, chunk_size=1))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[0][-3:], (2, Decimal('9.99'), Decimal('19.98')))
+
+    def test_endpoint_streams_csv_and_jsonl(self):
+        self.assertEqual(self.client.get('/admin-panel/exports/order-items/').status_code, 302)
+        self.client.force_login(self.admin)
+        response = self.client.get('/admin-panel/exports/order-items/?format=csv&status=pending')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertIn('"Dune, Part One"', lines[1])
+
+        response = self.client.get('/admin-panel/exports/order-items/?format=jsonl')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="order-items.jsonl"')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[0]['line_total'], '19.98')
+        self.assertEqual(self.client.get('/admin-panel/exports/order-items/?format=xml').status_code, 400)
+
+    def test_command(self):
+        err = io.StringIO()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'items.csv')
+            call_command('export_order_items', '-o', path, '--status', 'confirmed', stderr=err)
+            with open(path) as f:
+                self.assertEqual(len(f.read().splitlines()), 5)
+        self.assertIn("Exported 4 order lines", err.getvalue())
+
+
+class SalesRollupTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='boss', password='pass12345', role='admin')
+        self.user = User.objects.create_user(username='buyer', password='pass12345', address='1 Main St')
+        author = Author.objects.create(name="John Doe")
+        self.books = [
+            Book.objects.create(title=f"Book {i}", author=author, category=Category.objects.create(name=f"Genre {i}"),
+                                isbn=f"978000000010{i}", description="", price=10 + i, stock_quantity=20)
+            for i in range(2)
+        ]
+        self.cart = Cart.objects.create(user=self.user)
+
+    def order(self, status='confirmed'):
+        for quantity, book in enumerate(self.books, start=1):
+            CartItem.objects.create(cart=self.cart, book=book, quantity=quantity)
+        return place_order(self.user, status=status)
+
+    def test_confirmed_orders_are_recorded(self):
+        self.order()
+        self.order()
+        pending = self.order(status='pending')
+        day = DailySales.objects.get()
+        self.assertEqual((day.orders, day.quantity, day.revenue), (2, 6, Decimal('64')))
+
+        confirm_order(pending.pk)
+        confirm_order(pending.pk)
+        day.refresh_from_db()
+        self.assertEqual((day.orders, day.quantity, day.revenue), (3, 9, Decimal('96')))
+        book = DailyBookSales.objects.get(book=self.books[1])
+        self.assertEqual((book.orders, book.quantity, book.revenue), (3, 6, Decimal('66')))
+        self.assertEqual(DailyCategorySales.objects.get(category=self.books[0].category).revenue, Decimal('30'))
+
+    def test_rebuild_matches_incremental(self):
+        self.order()
+        self.order(status='pending')
+        self.order()
+        rollups = (DailySales, DailyBookSales, DailyCategorySales)
+        fields = ('day', 'orders', 'quantity', 'revenue')
+        recorded = [sorted(model.objects.values_list(*fields)) for model in rollups]
+        DailySales.objects.update(orders=0)
+        out = io.StringIO()
+        call_command('rebuild_sales_rollups', stdout=out)
+        self.assertIn("Rebuilt 5 rollup rows", out.getvalue())
+        self.assertEqual([sorted(model.objects.values_list(*fields)) for model in rollups], recorded)
+
+    def test_dashboard(self):
+        self.order()
+        with self.assertNumQueries(3):
+            sales = sales_dashboard(days=7)
+        self.assertEqual(len(sales['timeline']), 7)
+        self.assertEqual(sales['timeline'][-1]['day'], timezone.localdate())
+        self.assertEqual(sales['timeline'][-1]['percent'], 100)
+        self.assertEqual((sales['orders'], sales['revenue']), (1, 32))
+        self.assertEqual([book['book__title'] for book in sales['top_books']], ["Book 1", "Book 0"])
+
+        self.client.force_login(self.admin)
+        response = self.client.get('/admin-panel/')
+        self.assertContains(response, "Ventes des 30 derniers jours")
+        self.assertContains(response, "Genre 1")
+
+
+class CounterTest(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="Fiction")
+        self.author = Author.objects.create(name="John Doe")
+        self.user = User.objects.create_user(username='reader', password='pass12345')
+
+    def make_books(self, n):
+        return [
+            Book.objects.create(title=f"Book {i}", author=self.author, category=self.category,
+                                isbn=f"97800000002{i:02d}", description="", price=10, stock_quantity=5)
+            for i in range(n)
+        ]
+
+    def test_signals_keep_counts(self):
+        books = self.make_books(3)
+        Order.objects.create(user=self.user, total_amount=10, shipping_address="x")
+        self.assertEqual(get_counts(), {'users': 1, 'books': 3, 'orders': 1, 'categories': 1})
+
+        books[0].delete()
+        books[1].save()
+        self.user.delete()
+        with self.assertNumQueries(1):
+            self.assertEqual(get_counts(), {'users': 0, 'books': 2, 'orders': 0, 'categories': 1})
+
+    def test_reconcile_fixes_bulk_writes(self):
+        self.make_books(2)
+        Category.objects.bulk_create([Category(name="History"), Category(name="Poetry")])
+        self.assertEqual(get_counts()['categories'], 1)
+        out = io.StringIO()
+        call_command('reconcile_counters', stdout=out)
+        self.assertIn("categories: 1 -> 3", out.getvalue())
+        self.assertIn("Fixed 1 counter(s).", out.getvalue())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            clear_catalog()
+        self.assertEqual(get_counts()['books'], 0)
+        self.assertEqual(get_counts()['categories'], 0)
+
+    def test_admin_panel(self):
+        self.make_books(2)
+        admin = User.objects.create_user(username='boss', password='pass12345', role='admin')
+        self.client.force_login(admin)
+        response = self.client.get('/admin-panel/')
+        self.assertEqual(response.context['books_count'], 2)
+        self.assertEqual(response.context['users_count'], 2)
+
+
+class RecommendationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        author, category = Author.objects.create(name="John Doe"), Category.objects.create(name="Fiction")
+        self.books = {
+            name: Book.objects.create(title=f"Book {name}", author=author, category=category,
+                                      isbn=f"978000000030{i}", description="", price=10, stock_quantity=5)
+            for i, name in enumerate('ABCDE')
+        }
+        self.user = User.objects.create_user(username='reader', password='pass12345')
+        for basket, status in (('AB', 'delivered'), ('ABC', 'confirmed'), ('AD', 'pending'), ('CE', 'cancelled')):
+            self.order(basket, status)
+
+    def order(self, basket, status='confirmed'):
+        order = Order.objects.create(user=self.user, total_amount=10, shipping_address="x", status=status)
+        OrderItem.objects.bulk_create(
+            OrderItem(order=order, book=self.books[name], quantity=1, price=10) for name in basket
+        )
+        return order
+
+    def recommended(self, name):
+        return [(r.recommended.title[-1], r.orders) for r in get_recommendations(self.books[name].pk)]
+
+    def test_rebuild_counts_sold_orders(self):
+        stats = rebuild_recommendations()
+        self.assertEqual((stats.books, stats.recommendations), (3, 6))
+        self.assertEqual(self.recommended('A'), [('B', 2), ('C', 1)])
+        self.assertEqual(self.recommended('C'), [('A', 1), ('B', 1)])
+        self.assertEqual(self.recommended('D'), [])
+        with self.assertNumQueries(1):
+            self.recommended('B')
+
+    def test_refresh_only_recomputes_changed_orders(self):
+        Order.objects.update(updated_at=timezone.now() - timedelta(days=1))
+        rebuild_recommendations()
+        self.order('CD')
+        stats = refresh_recommendations()
+        self.assertEqual((stats.full, stats.books), (False, 2))
+        self.assertEqual(self.recommended('C'), [('A', 1), ('B', 1), ('D', 1)])
+        self.assertEqual(self.recommended('D'), [('C', 1)])
+
+        refreshed = sorted(BookRecommendation.objects.values_list('book', 'recommended', 'rank', 'orders'))
+        rebuild_recommendations()
+        self.assertEqual(sorted(BookRecommendation.objects.values_list('book', 'recommended', 'rank', 'orders')), refreshed)
+
+    def test_book_detail(self):
+        url = f"/books/{self.books['A'].pk}/"
+        response = self.client.get(url)
+        self.assertNotContains(response, "Customers also bought")
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('refresh_recommendations', stdout=io.StringIO())
+        # The refresh changes the page, so the old ETag no longer matches
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+        response = self.client.get(url)
+        self.assertContains(response, "Customers also bought")
+        self.assertContains(response, "Book B")
+        self.assertNotContains(response, "Book D")
+
+    def test_recommended_book_change_invalidates_page(self):
+        rebuild_recommendations()
+        # Last-Modified has a one second resolution
+        yesterday = timezone.now() - timedelta(days=1)
+        Book.objects.update(updated_at=yesterday)
+        RecommendationRun.objects.update(started_at=yesterday)
+        cache.clear()
+        url = f"/books/{self.books['A'].pk}/"
+        response = self.client.get(url)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304)
+
+        book = self.books['B']
+        book.title = "Book B, second edition"
+        book.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 200)
+        self.assertContains(self.client.get(url), "second edition")
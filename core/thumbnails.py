@@ -0,0 +1,70 @@
+import os
+import re
+from django.conf import settings
+from PIL import Image
+
+# Widths (in pixels) generated for every cover, each as JPEG and WebP. Covers
+# are displayed 100px wide in carts and orders, 200px in the catalog and 300px
+# on the detail page.
+THUMBNAIL_WIDTHS = (100, 200, 300)
+THUMBNAIL_FORMATS = {
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+}
+
+_THUMBNAIL_RE = re.compile(r'\.\d+w\.(jpg|webp)$')
+
+def thumbnail_name(name, width, ext):
+    """``book_covers/x.jpg`` -> ``book_covers/x.200w.webp``"""
+    stem, _ = os.path.splitext(name)
+    return f'{stem}.{width}w.{ext}'
+
+def is_thumbnail(name):
+    return bool(_THUMBNAIL_RE.search(name))
+
+def source_stem(name):
+    """``book_covers/x.200w.webp`` and ``book_covers/x.jpg`` -> ``book_covers/x``"""
+    if is_thumbnail(name):
+        return _THUMBNAIL_RE.sub('', name)
+    return os.path.splitext(name)[0]
+
+def has_thumbnails(name):
+    # The largest WebP is written last, so it marks a complete set
+    return os.path.exists(os.path.join(settings.MEDIA_ROOT, thumbnail_name(name, THUMBNAIL_WIDTHS[-1], 'webp')))
+
+def generate_thumbnails(name, image=None, force=False):
+    """Write every width and format of the cover stored at ``name`` (relative to MEDIA_ROOT).
+
+    ``image`` avoids re-reading a cover that was just rendered. Thumbnails
+    newer than the original are kept unless ``force``. Returns the names
+    written.
+    """
+    source = os.path.join(settings.MEDIA_ROOT, name)
+    source_mtime = os.path.getmtime(source)
+    targets = [
+        (width, ext, os.path.join(settings.MEDIA_ROOT, thumbnail_name(name, width, ext)))
+        for width in THUMBNAIL_WIDTHS for ext in THUMBNAIL_FORMATS
+    ]
+    if not force:
+        targets = [t for t in targets if not os.path.exists(t[2]) or os.path.getmtime(t[2]) < source_mtime]
+    if not targets:
+        return []
+
+    if image is None:
+        with Image.open(source) as original:
+            image = original.convert('RGB')
+    written = []
+    resized = {}
+    for width, ext, path in targets:
+        if width not in resized:
+            height = round(image.height * width / image.width)
+            resized[width] = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+        image_format, options = THUMBNAIL_FORMATS[ext]
+        resized[width].save(path, image_format, **options)
+        written.append(thumbnail_name(name, width, ext))
+    return written
+
+def srcset(name, ext):
+    return ', '.join(
+        f'{settings.MEDIA_URL}{thumbnail_name(name, width, ext)} {width}w' for width in THUMBNAIL_WIDTHS
+    )
@@ -17,6 +17,7 @@ urlpatterns = [
     path('live-search/', views.live_search, name='live_search'),
     path('my-orders/', views.my_orders, name='my_orders'),
     path('checkout/', views.checkout, name='checkout'),
+    path('orders/<str:order_number>/', views.order_status, name='order_status'),
     # Admin Panel URLs
     path('admin-panel/', views.admin_panel, name='admin_panel'),
     path('admin-panel/users/', views.admin_users, name='admin_users'),
@@ -24,6 +25,7 @@ urlpatterns = [
     path('admin-panel/books/', views.admin_books, name='admin_books'),
     path('admin-panel/books/add/', views.admin_add_book, name='admin_add_book'),
     path('admin-panel/orders/', views.admin_orders, name='admin_orders'),
+    path('admin-panel/exports/order-items/', views.admin_export_order_items, name='admin_export_order_items'),
     path('admin-panel/users/delete/<int:user_id>/', views.admin_delete_user, name='admin_delete_user'),
     path('admin-search-books/', views.admin_search_books, name='admin_search_books'),
     path('admin-update-book-price/<int:book_id>/', views.admin_update_book_price, name='admin_update_book_price'),
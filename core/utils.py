@@ -1,56 +1,86 @@
 import os
 import random
 import textwrap
+from functools import lru_cache
 from PIL import Image, ImageDraw, ImageFont
 from django.conf import settings
+from .thumbnails import generate_thumbnails
 
-def create_book_cover(title, author, category_name, isbn):
-    color_schemes = {
-        'Literature': (139, 69, 19),
-        'Educational / School Books': (0, 100, 0),
-        'Science and Technology': (70, 130, 180),
-        'Human and Social Sciences': (128, 0, 128),
-        'Economics and Management': (184, 134, 11),
-        'Languages': (220, 20, 60),
-        'Personal Development': (255, 140, 0),
-        'Arts and Culture': (75, 0, 130),
-        'Religion and Spirituality': (25, 25, 112),
-        'Leisure and Practical Life': (34, 139, 34),
-        'Health / Well-being': (0, 128, 128),
-        'Sustainable Development / Ecology': (107, 142, 35),
-        'Biographies and Testimonies': (139, 0, 0),
-        'Law': (72, 61, 139),
-        'Methodology / Research': (105, 105, 105)
-    }
-    
-    base_color = color_schemes.get(category_name, (70, 130, 180))
-    width, height = 300, 450
-    
-    img = Image.new('RGB', (width, height), base_color)
-    draw = ImageDraw.Draw(img)
-    
-    for y in range(height):
-        for x in range(width):
-            noise = random.randint(-15, 15)
-            r = max(0, min(255, base_color[0] + noise))
-            g = max(0, min(255, base_color[1] + noise))
-            b = max(0, min(255, base_color[2] + noise))
-            img.putpixel((x, y), (r, g, b))
-    
+COVER_SIZE = (300, 450)
+NOISE_AMPLITUDE = 15
+
+COLOR_SCHEMES = {
+    'Literature': (139, 69, 19),
+    'Educational / School Books': (0, 100, 0),
+    'Science and Technology': (70, 130, 180),
+    'Human and Social Sciences': (128, 0, 128),
+    'Economics and Management': (184, 134, 11),
+    'Languages': (220, 20, 60),
+    'Personal Development': (255, 140, 0),
+    'Arts and Culture': (75, 0, 130),
+    'Religion and Spirituality': (25, 25, 112),
+    'Leisure and Practical Life': (34, 139, 34),
+    'Health / Well-being': (0, 128, 128),
+    'Sustainable Development / Ecology': (107, 142, 35),
+    'Biographies and Testimonies': (139, 0, 0),
+    'Law': (72, 61, 139),
+    'Methodology / Research': (105, 105, 105)
+}
+DEFAULT_COLOR = (70, 130, 180)
+
+# Maps a random byte to a noise offset in [0, 2 * NOISE_AMPLITUDE]. Bytes from
+# _NOISE_LIMIT up are rejected so that every offset is equally likely.
+_NOISE_RANGE = 2 * NOISE_AMPLITUDE + 1
+_NOISE_LIMIT = 256 - 256 % _NOISE_RANGE
+_NOISE_TABLE = bytes(b % _NOISE_RANGE for b in range(256))
+_NOISE_REJECTED = bytes(range(_NOISE_LIMIT, 256))
+
+@lru_cache(maxsize=None)
+def _load_fonts():
+    try:
+        return (
+            ImageFont.truetype("arial.ttf", 24),
+            ImageFont.truetype("arial.ttf", 16),
+            ImageFont.truetype("arial.ttf", 12),
+        )
+    except OSError:
+        default = ImageFont.load_default()
+        return default, default, default
+
+def _noise_offsets(count):
+    offsets = b''
+    while len(offsets) < count:
+        missing = count - len(offsets)
+        raw = random.randbytes(missing + missing // 16 + 16)
+        offsets += raw.translate(_NOISE_TABLE, _NOISE_REJECTED)
+    return offsets[:count]
+
+def noise_background(base_color, size=COVER_SIZE):
+    """Noisy cover background built from a random byte buffer.
+
+    Every pixel gets the same offset in [-15, 15] on all three channels, like
+    the old putpixel loop, but the work happens in PIL instead of Python.
+    """
+    width, height = size
+    noise = Image.frombytes('L', size, _noise_offsets(width * height))
+    channels = [
+        noise.point([max(0, min(255, c + n - NOISE_AMPLITUDE)) for n in range(256)])
+        for c in base_color
+    ]
+    return Image.merge('RGB', channels)
+
+def render_book_cover(title, author, category_name, isbn):
+    base_color = COLOR_SCHEMES.get(category_name, DEFAULT_COLOR)
+    width, height = COVER_SIZE
+
+    img = noise_background(base_color)
     draw = ImageDraw.Draw(img)
     
     border_color = tuple(max(0, c - 40) for c in base_color)
     draw.rectangle([10, 10, width-10, height-10], outline=border_color, width=3)
     draw.rectangle([15, 15, width-15, height-15], outline=border_color, width=1)
     
-    try:
-        title_font = ImageFont.truetype("arial.ttf", 24)
-        author_font = ImageFont.truetype("arial.ttf", 16)
-        small_font = ImageFont.truetype("arial.ttf", 12)
-    except:
-        title_font = ImageFont.load_default()
-        author_font = ImageFont.load_default()
-        small_font = ImageFont.load_default()
+    title_font, author_font, small_font = _load_fonts()
     
     title_area_y = 40
     title_lines = textwrap.wrap(title, width=20)
@@ -95,9 +125,19 @@ def create_book_cover(title, author, category_name, isbn):
     isbn_text = f"ISBN: {isbn[:13]}"
     draw.text((width - 120, height - 25), isbn_text, fill=(200, 200, 200), font=small_font)
     
-    filename = f"{isbn}_{category_name.replace(' ', '_').replace('/', '_')}.jpg"
+    return img
+
+def cover_filename(isbn, category_name):
+    return f"{isbn}_{category_name.replace(' ', '_').replace('/', '_')}.jpg"
+
+def create_book_cover(title, author, category_name, isbn):
+    img = render_book_cover(title, author, category_name, isbn)
+
+    filename = cover_filename(isbn, category_name)
     cover_path = os.path.join(settings.MEDIA_ROOT, 'book_covers', filename)
     os.makedirs(os.path.dirname(cover_path), exist_ok=True)
     img.save(cover_path, 'JPEG', quality=95)
-    
-    return f"book_covers/{filename}"
\ No newline at end of file
+
+    name = f"book_covers/{filename}"
+    generate_thumbnails(name, image=img, force=True)
+    return name
@@ -1,29 +1,53 @@
+import logging
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
-from django.db.models import Q
-from django.http import HttpResponseRedirect, JsonResponse
-from .models import Book, Category, Cart, CartItem, Order, OrderItem, User, Author
-from .forms import UserRegistrationForm, UserLoginForm, BookForm, UserForm, CategoryForm, AuthorForm
+from django.http import Http404, JsonResponse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from .models import Book, Cart, CartItem, Order, OrderItem, User
+from .forms import UserRegistrationForm, UserLoginForm, BookForm, UserForm
+from .search import search_books
+from .pagination import keyset_paginate, offset_paginate
+from .featured import featured_books
+from .checkout import place_order, CheckoutError
+from .payments import submit_payment
+from .cart import get_cart_summary, cart_lines
+from .catalog import get_book, get_categories, in_stock_count, cache_stats
+from .conditional import catalog_etag, book_etag, book_last_modified, search_etag
+from .thumbnails import has_thumbnails, srcset
+from .listings import (
+    ADMIN_PAGE_SIZE, BOOK_LIST_FIELDS, ORDER_LIST_FIELDS, USER_LIST_FIELDS,
+    filter_orders, filter_users,
+)
+from .exports import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, ORDER_ITEM_COLUMNS, order_item_rows, streaming_export
+from .analytics import sales_dashboard
+from .counters import get_counts
+from .recommendations import request_recommendations
+
+logger = logging.getLogger(__name__)
+
+BOOK_CARD_FIELDS = ('id', 'title', 'price', 'cover_image', 'shuffle_key', 'updated_at', 'author__name')
 
 def home(request):
-    books = Book.objects.filter(stock_quantity__gt=0).order_by('?')[:8]
-    categories = Category.objects.all()[:6]
-    
-    # Ajouter le nombre d'articles dans le panier
-    cart_count = 0
-    if request.user.is_authenticated:
-        cart_count = CartItem.objects.filter(cart__user=request.user).count()
+    books = featured_books(
+        Book.objects.filter(stock_quantity__gt=0).select_related('author').only(*BOOK_CARD_FIELDS)
+    )
+    categories = get_categories()[:6]
     
+    # Le nombre d'articles du panier vient du context processor cart_summary
     return render(request, 'core/home.html', {
         'books': books,
-        'categories': categories,
-        'cart_count': cart_count
+        'categories': categories
     })
 
+# Les pages du catalogue sont revalidées à chaque visite : 304 tant que rien n'a changé
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=catalog_etag)
 def book_list(request):
-    books = Book.objects.filter(stock_quantity__gt=0)
+    # Only the columns the book card shows
+    books = Book.objects.filter(stock_quantity__gt=0).select_related('author').only(*BOOK_CARD_FIELDS)
     category_id = request.GET.get('category')
     search_query = request.GET.get('search')
     
@@ -31,23 +55,31 @@ def book_list(request):
         books = books.filter(category_id=category_id)
     
     if search_query:
-        books = books.filter(
-            Q(title__icontains=search_query) |
-            Q(author__name__icontains=search_query) |
-            Q(isbn__icontains=search_query)
-        )
+        books = search_books(books, search_query)
+        page, total_count = offset_paginate(books, request.GET)
     else:
-        books = books.order_by('?')
+        # Shuffled but stable order, so the cursor survives between pages
+        page = keyset_paginate(books, request.GET, field='shuffle_key', descending=False)
+        total_count = in_stock_count(category_id)
     
-    categories = Category.objects.all()
+    categories = get_categories()
     return render(request, 'core/book_list.html', {
-        'books': books,
+        'books': page,
+        'total_count': total_count,
         'categories': categories
     })
 
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=book_etag, last_modified_func=book_last_modified)
 def book_detail(request, book_id):
-    book = get_object_or_404(Book, id=book_id)
-    return render(request, 'core/book_detail.html', {'book': book})
+    try:
+        book = get_book(book_id)
+    except Book.DoesNotExist:
+        raise Http404('No Book matches the given query.')
+    return render(request, 'core/book_detail.html', {
+        'book': book,
+        'recommendations': request_recommendations(request, book_id),
+    })
 
 def register(request):
     if request.method == 'POST':
@@ -128,7 +160,7 @@ def add_to_cart(request, book_id):
         message = f'{book.title} has been added to your cart.'
     
     # Calculer le nombre total d'articles dans le panier
-    cart_count = CartItem.objects.filter(cart=cart).count()
+    cart_count = get_cart_summary(request.user)['count']
     
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         return JsonResponse({
@@ -142,13 +174,8 @@ def add_to_cart(request, book_id):
 
 @login_required
 def cart_detail(request):
-    try:
-        cart = Cart.objects.get(user=request.user)
-        cart_items = CartItem.objects.filter(cart=cart)
-        total = sum(item.book.price * item.quantity for item in cart_items)
-    except Cart.DoesNotExist:
-        cart_items = []
-        total = 0
+    cart_items = list(cart_lines(request.user))
+    total = get_cart_summary(request.user)['total']
     
     return render(request, 'core/cart.html', {
         'cart_items': cart_items,
@@ -161,7 +188,7 @@ def remove_from_cart(request, item_id):
     cart_item.delete()
     
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        cart_count = CartItem.objects.filter(cart__user=request.user).count()
+        cart_count = get_cart_summary(request.user)['count']
         return JsonResponse({'success': True, 'cart_count': cart_count})
     
     messages.success(request, 'Item removed from cart.')
@@ -170,7 +197,7 @@ def remove_from_cart(request, item_id):
 @login_required
 def update_cart_quantity(request, item_id):
     if request.method == 'POST':
-        cart_item = get_object_or_404(CartItem, id=item_id, cart__user=request.user)
+        cart_item = get_object_or_404(CartItem.objects.select_related('book'), id=item_id, cart__user=request.user)
         quantity = int(request.POST.get('quantity', 1))
         
         if quantity <= 0:
@@ -187,14 +214,12 @@ def update_cart_quantity(request, item_id):
             return redirect('cart_detail')
         
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-            cart_count = CartItem.objects.filter(cart__user=request.user).count()
-            cart_items = CartItem.objects.filter(cart__user=request.user)
-            total = sum(item.book.price * item.quantity for item in cart_items)
+            summary = get_cart_summary(request.user)
             return JsonResponse({
                 'success': True, 
                 'message': message,
-                'cart_count': cart_count,
-                'total': float(total)
+                'cart_count': summary['count'],
+                'total': float(summary['total'])
             })
         
         messages.success(request, message)
@@ -202,21 +227,18 @@ def update_cart_quantity(request, item_id):
     return redirect('cart_detail')
 
 def get_cart_count(request):
-    if request.user.is_authenticated:
-        cart_count = CartItem.objects.filter(cart__user=request.user).count()
-        return JsonResponse({'cart_count': cart_count})
-    return JsonResponse({'cart_count': 0})
+    return JsonResponse({'cart_count': get_cart_summary(request.user)['count']})
 
+@cache_control(public=True, max_age=60)
+@condition(etag_func=search_etag)
 def live_search(request):
     query = request.GET.get('q', '').strip()
     if len(query) < 1:
         return JsonResponse({'books': []})
     
-    books = Book.objects.filter(
-        Q(title__icontains=query) |
-        Q(author__name__icontains=query) |
-        Q(isbn__icontains=query),
-        stock_quantity__gt=0
+    books = search_books(
+        Book.objects.filter(stock_quantity__gt=0).select_related('author'),
+        query
     )[:10]
     
     books_data = []
@@ -226,7 +248,8 @@ def live_search(request):
             'title': book.title,
             'author': book.author.name,
             'price': float(book.price),
-            'cover_image': book.cover_image.url if book.cover_image else None
+            'cover_image': book.cover_url,
+            'cover_srcset': srcset(book.cover_image.name, 'jpg') if book.cover_image and has_thumbnails(book.cover_image.name) else '',
         })
     
     return JsonResponse({'books': books_data})
@@ -234,15 +257,10 @@ def live_search(request):
 @login_required
 def my_orders(request):
     # Récupérer les livres achetés (commandes)
-    purchased_books = OrderItem.objects.filter(order__user=request.user).select_related('book', 'order')
+    purchased_books = OrderItem.objects.filter(order__user=request.user).select_related('book__author', 'order')
     
     # Récupérer les livres dans le panier
-    cart_books = []
-    try:
-        cart = Cart.objects.get(user=request.user)
-        cart_books = CartItem.objects.filter(cart=cart).select_related('book')
-    except Cart.DoesNotExist:
-        pass
+    cart_books = cart_lines(request.user)
     
     return render(request, 'core/my_orders.html', {
         'purchased_books': purchased_books,
@@ -251,79 +269,82 @@ def my_orders(request):
 
 @login_required
 def checkout(request):
-    try:
-        cart = Cart.objects.get(user=request.user)
-        cart_items = CartItem.objects.filter(cart=cart)
-        
-        if not cart_items:
-            messages.warning(request, 'Your cart is empty.')
+    if request.method == 'POST':
+        try:
+            order = place_order(request.user, status='pending')
+        except CheckoutError as e:
+            messages.error(request, str(e))
             return redirect('cart_detail')
         
-        total = sum(item.book.price * item.quantity for item in cart_items)
-        
-    except Cart.DoesNotExist:
+        # The gateway answers in the background, the client polls order_status
+        submit_payment(order)
+        return redirect('order_status', order_number=order.order_number)
+    
+    cart_items = list(cart_lines(request.user))
+    if not cart_items:
         messages.warning(request, 'Your cart is empty.')
         return redirect('cart_detail')
     
-    if request.method == 'POST':
-        import time
-        import random
-        
-        time.sleep(1)
-        payment_success = random.random() < 0.95
-        
-        if payment_success:
-            order = Order.objects.create(
-                user=request.user,
-                total_amount=total,
-                status='completed'
-            )
-            
-            for item in cart_items:
-                OrderItem.objects.create(
-                    order=order,
-                    book=item.book,
-                    quantity=item.quantity,
-                    price=item.book.price
-                )
-                
-                item.book.stock_quantity -= item.quantity
-                item.book.save()
-            
-            cart_items.delete()
-            
-            messages.success(request, f'Payment successful! Order #{order.id} confirmed.')
-            return render(request, 'core/payment_success.html', {'order': order})
-        else:
-            messages.error(request, 'Payment failed. Please try again.')
-    
     return render(request, 'core/checkout.html', {
         'cart_items': cart_items,
-        'total': total
+        'total': get_cart_summary(request.user)['total']
     })
 
+@login_required
+def order_status(request, order_number):
+    order = get_object_or_404(Order, order_number=order_number, user=request.user)
+    
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        return JsonResponse({
+            'status': order.status,
+            'status_display': order.get_status_display()
+        })
+    
+    if order.status == 'pending':
+        return render(request, 'core/payment_pending.html', {'order': order})
+    if order.status == 'cancelled':
+        messages.error(request, 'Payment failed. Please try again.')
+        return redirect('cart_detail')
+    return render(request, 'core/payment_success.html', {'order': order})
+
 # Admin Panel Views
 def is_admin(user):
     return user.is_authenticated and (user.is_superuser or user.role == 'admin')
 
 @user_passes_test(is_admin)
 def admin_panel(request):
-    users_count = User.objects.count()
-    books_count = Book.objects.count()
-    orders_count = Order.objects.count()
-    categories_count = Category.objects.count()
-    
+    counts = get_counts()
     return render(request, 'core/admin_panel.html', {
-        'users_count': users_count,
-        'books_count': books_count,
-        'orders_count': orders_count,
-        'categories_count': categories_count
+        'users_count': counts['users'],
+        'books_count': counts['books'],
+        'orders_count': counts['orders'],
+        'categories_count': counts['categories'],
+        'cache_stats': cache_stats(),
+        'sales': sales_dashboard(),
     })
 
+def _filter_query(params):
+    # The current filters without the page cursor, for export links
+    query = params.copy()
+    for key in ('after', 'before', 'format'):
+        query.pop(key, None)
+    return query.urlencode()
+
 @user_passes_test(is_admin)
 def admin_users(request):
-    users = User.objects.all().order_by('-created_at')
-    return render(request, 'core/admin_users.html', {'users': users})
+    users = filter_users(User.objects.only(*USER_LIST_FIELDS), request.GET)
+    if request.GET.get('format') == 'csv':
+        rows = users.order_by('-id').values_list('id', 'username', 'email', 'role', 'is_superuser', 'created_at')
+        header = ['id', 'username', 'email', 'role', 'is_superuser', 'created_at']
+        return streaming_export('users', 'csv', header, rows.iterator(chunk_size=EXPORT_CHUNK_SIZE))
+
+    # Newest first; ids follow creation order and keep every page an index range scan
+    return render(request, 'core/admin_users.html', {
+        'users': keyset_paginate(users, request.GET, per_page=ADMIN_PAGE_SIZE),
+        'roles': User.ROLE_CHOICES,
+        'filters': request.GET,
+        'filter_query': _filter_query(request.GET),
+    })
 
 @user_passes_test(is_admin)
 def admin_add_user(request):
@@ -339,35 +360,30 @@ def admin_add_user(request):
 
 @user_passes_test(is_admin)
 def admin_books(request):
-    books = Book.objects.all().order_by('-created_at')
+    books = Book.objects.select_related('author', 'category').only(*BOOK_LIST_FIELDS)
     search_query = request.GET.get('search')
-    
+
     if search_query:
-        books = books.filter(
-            Q(title__icontains=search_query) |
-            Q(author__name__icontains=search_query) |
-            Q(isbn__icontains=search_query)
-        )
-    
+        books, _ = offset_paginate(search_books(books, search_query), request.GET, per_page=ADMIN_PAGE_SIZE)
+    else:
+        # Newest first; ids follow creation order
+        books = keyset_paginate(books, request.GET, per_page=ADMIN_PAGE_SIZE)
     return render(request, 'core/admin_books.html', {'books': books})
 
 @user_passes_test(is_admin)
 def admin_add_book(request):
     if request.method == 'POST':
-        print(f"POST data: {request.POST}")
         form = BookForm(request.POST, request.FILES)
-        print(f"Form is valid: {form.is_valid()}")
         if form.is_valid():
             try:
                 book = form.save()
-                print(f"Book saved: {book.id} - {book.title}")
                 messages.success(request, 'Book added successfully!')
                 return redirect('admin_add_book')
             except Exception as e:
-                print(f"Error saving book: {e}")
+                logger.exception("Error saving book")
                 messages.error(request, f'Error creating book: {str(e)}')
         else:
-            print(f"Form errors: {form.errors}")
+            logger.info("Invalid book form: %s", form.errors.as_json())
             for field, errors in form.errors.items():
                 for error in errors:
                     messages.error(request, f'{field}: {error}')
@@ -377,8 +393,29 @@ def admin_add_book(request):
 
 @user_passes_test(is_admin)
 def admin_orders(request):
-    orders = Order.objects.all().order_by('-created_at')
-    return render(request, 'core/admin_orders.html', {'orders': orders})
+    orders = filter_orders(Order.objects.select_related('user').only(*ORDER_LIST_FIELDS), request.GET)
+    if request.GET.get('format') == 'csv':
+        rows = orders.order_by('-id').values_list(
+            'id', 'order_number', 'user__username', 'total_amount', 'status', 'created_at'
+        )
+        header = ['id', 'order_number', 'customer', 'total_amount', 'status', 'created_at']
+        return streaming_export('orders', 'csv', header, rows.iterator(chunk_size=EXPORT_CHUNK_SIZE))
+
+    return render(request, 'core/admin_orders.html', {
+        'orders': keyset_paginate(orders, request.GET, per_page=ADMIN_PAGE_SIZE),
+        'statuses': Order.STATUS_CHOICES,
+        'filters': request.GET,
+        'filter_query': _filter_query(request.GET),
+    })
+
+@user_passes_test(is_admin)
+def admin_export_order_items(request):
+    # Une ligne par article commandé, pour la comptabilité
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        return JsonResponse({'error': f"Unknown format, use one of: {', '.join(EXPORT_FORMATS)}"}, status=400)
+    header = [name for name, _ in ORDER_ITEM_COLUMNS]
+    return streaming_export('order-items', fmt, header, order_item_rows(request.GET))
 
 from django.views.decorators.csrf import csrf_exempt
 
@@ -392,16 +429,14 @@ def admin_delete_user(request, user_id):
     return JsonResponse({'success': False})
 
 @user_passes_test(is_admin)
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=search_etag)
 def admin_search_books(request):
     query = request.GET.get('q', '').strip()
     if len(query) < 1:
-        books = Book.objects.all().order_by('-created_at')[:20]
+        books = Book.objects.select_related('author', 'category').order_by('-created_at')[:20]
     else:
-        books = Book.objects.filter(
-            Q(title__icontains=query) |
-            Q(author__name__icontains=query) |
-            Q(isbn__icontains=query)
-        ).order_by('-created_at')[:20]
+        books = search_books(Book.objects.select_related('author', 'category'), query)[:20]
     
     books_data = []
     for book in books: